@@ -0,0 +1,187 @@
+"""
+Compressed artifact storage for Codebase Genius
+Writes generated docs and analysis artifacts as plain, gzip or zstd files
+(chosen by CODEGENIUS_COMPRESSION) and reads whichever variant is on disk,
+so callers keep using the plain file name
+"""
+
+import io
+import os
+import gzip
+import base64
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Optional, Tuple
+
+
+CODECS = ("none", "gzip", "zstd")
+SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# Decoded documents kept in memory for paged reads, keyed by path and mtime
+_DECODED_MAX = 8
+
+_decoded: "OrderedDict[str, tuple]" = OrderedDict()
+_decoded_lock = threading.Lock()
+
+
+def zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_codec(codec: Optional[str] = None) -> str:
+    """Codec from the argument or CODEGENIUS_COMPRESSION; zstd needs the zstandard package
+    and falls back to gzip without it"""
+    codec = (codec or os.getenv("CODEGENIUS_COMPRESSION", "") or "none").strip().lower()
+    if codec not in CODECS:
+        return "none"
+    if codec == "zstd" and not zstd_available():
+        return "gzip"
+    return codec
+
+
+def compress_bytes(data: bytes, codec: str, level: Optional[int] = None) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL if level is None else level, mtime=0)
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL if level is None else level).compress(data)
+    return data
+
+
+def decompress_bytes(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def stored_path(path: str) -> Optional[Tuple[str, str]]:
+    """(path on disk, codec) of the stored variant of path, or None"""
+    for codec in CODECS:
+        candidate = path + SUFFIXES[codec]
+        if os.path.exists(candidate):
+            return candidate, codec
+    return None
+
+
+def open_stored(path: str) -> BinaryIO:
+    """Binary reader over the decoded content of path, whichever variant is stored"""
+    found = stored_path(path)
+    if found is None:
+        raise FileNotFoundError(path)
+    actual, codec = found
+    if codec == "gzip":
+        return gzip.open(actual, 'rb')
+    if codec == "zstd":
+        import zstandard
+        raw = open(actual, 'rb')
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    return open(actual, 'rb')
+
+
+def read_stored(path: str) -> bytes:
+    """Decoded content of path; compressed files are decoded once per modification"""
+    found = stored_path(path)
+    if found is None:
+        raise FileNotFoundError(path)
+    actual, codec = found
+    if codec == "none":
+        with open(actual, 'rb') as f:
+            return f.read()
+
+    mtime = os.stat(actual).st_mtime_ns
+    with _decoded_lock:
+        cached = _decoded.get(actual)
+        if cached is not None and cached[0] == mtime:
+            _decoded.move_to_end(actual)
+            return cached[1]
+    with open(actual, 'rb') as f:
+        data = decompress_bytes(f.read(), codec)
+    with _decoded_lock:
+        _decoded[actual] = (mtime, data)
+        _decoded.move_to_end(actual)
+        while len(_decoded) > _DECODED_MAX:
+            _decoded.popitem(last=False)
+    return data
+
+
+def _remove_other_variants(path: str, keep: str) -> None:
+    # A variant left from a run with another codec would shadow the new file
+    for codec in CODECS:
+        if codec != keep:
+            try:
+                os.remove(path + SUFFIXES[codec])
+            except FileNotFoundError:
+                pass
+
+
+def write_stored(path: str, data: bytes, codec: Optional[str] = None) -> str:
+    """Atomically store data at path with the configured codec; returns the file written"""
+    codec = resolve_codec(codec)
+    target = path + SUFFIXES[codec]
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    with open(target + ".tmp", 'wb') as f:
+        f.write(compress_bytes(data, codec))
+    os.replace(target + ".tmp", target)
+    _remove_other_variants(path, codec)
+    return target
+
+
+def compress_stored(path: str, codec: Optional[str] = None) -> str:
+    """Compress the plain file at path in place (streamed); returns the file now stored"""
+    codec = resolve_codec(codec)
+    if codec == "none":
+        _remove_other_variants(path, codec)
+        return path
+    target = path + SUFFIXES[codec]
+    with open(path, 'rb') as source, open(target + ".tmp", 'wb') as out:
+        if codec == "gzip":
+            with gzip.GzipFile(fileobj=out, mode='wb', compresslevel=GZIP_LEVEL, mtime=0) as sink:
+                for block in iter(lambda: source.read(1024 * 1024), b''):
+                    sink.write(block)
+        else:
+            import zstandard
+            zstandard.ZstdCompressor(level=ZSTD_LEVEL).copy_stream(source, out)
+    os.replace(target + ".tmp", target)
+    _remove_other_variants(path, codec)
+    return target
+
+
+def accepted_codecs(accept_encoding: str) -> set:
+    """Codings listed in an Accept-Encoding style value ("gzip, zstd;q=0.5")"""
+    accepted = set()
+    for item in (accept_encoding or "").split(','):
+        name, _, params = item.strip().lower().partition(';')
+        if params.strip().replace(' ', '') in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add("gzip" if name in ("gzip", "x-gzip") else name)
+    return accepted
+
+
+def document_payload(path: str, accept_encoding: str = "") -> Dict:
+    """A whole stored document for a JSON report.
+
+    When it is stored with a coding the client accepts, the stored bytes
+    are passed through as base64 (content_base64 plus encoding) without
+    decoding; otherwise the decoded text is returned as content.
+    """
+    found = stored_path(path)
+    if found is None:
+        raise FileNotFoundError(path)
+    actual, codec = found
+    if codec != "none" and codec in accepted_codecs(accept_encoding):
+        with open(actual, 'rb') as f:
+            raw = f.read()
+        return {
+            "encoding": codec,
+            "content_base64": base64.b64encode(raw).decode('ascii'),
+            "stored_size": len(raw)
+        }
+    return {"content": read_stored(path).decode('utf-8', errors='replace')}
@@ -0,0 +1,125 @@
+"""
+Batch documentation for Codebase Genius
+Documents many repositories in one call: clones overlap up to an I/O limit
+while every repository's parsing shares one process pool
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from utils import normalize_repository_url, resolve_worker_count, new_process_pool, env_int
+from pipeline import run_pipeline
+
+
+DEFAULT_BATCH_CLONES = 4
+
+
+def resolve_clone_concurrency(clones: Optional[int] = None) -> int:
+    """Concurrent clones per batch (argument, then CODEGENIUS_BATCH_CLONES, then 4)"""
+    if not clones:
+        clones = env_int("CODEGENIUS_BATCH_CLONES")
+    return max(1, clones or DEFAULT_BATCH_CLONES)
+
+
+def run_batch(
+    github_urls: List[str],
+    clone_concurrency: int = 0,
+    parse_workers: int = 0,
+    use_cache: bool = True,
+    incremental: bool = False,
+    clone_strategy: str = "",
+    use_result_cache: bool = True,
+    last_commits: Optional[Dict[str, str]] = None,
+    progress: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """Run the pipeline for every URL and return per-repository reports.
+
+    At most clone_concurrency clones or fetches run at once, and parsing for
+    all repositories goes through one pool of parse_workers processes, so
+    the batch never uses more than those limits. Each repository gets its
+    own report; an error in one never stops the others. Duplicate URLs
+    (after normalization) are documented once.
+    """
+    last_commits = last_commits or {}
+    urls = []
+    seen = set()
+    for url in github_urls:
+        key = normalize_repository_url(url)
+        if key not in seen:
+            seen.add(key)
+            urls.append(url)
+    if not urls:
+        return {
+            "status": "error",
+            "message": "No repository URLs given"
+        }
+
+    clones = resolve_clone_concurrency(clone_concurrency)
+    workers = resolve_worker_count(parse_workers)
+    clone_slots = threading.Semaphore(clones)
+    # One worker means parsing in each repository's own thread, as run_pipeline would
+    parse_pool = new_process_pool(workers) if workers > 1 else None
+    started = time.perf_counter()
+
+    def run_one(url: str) -> Dict:
+        forward = None
+        if progress is not None:
+            forward = lambda event: progress(dict(event, repository=url))
+        try:
+            report = run_pipeline(
+                url,
+                last_commit=last_commits.get(url, ""),
+                parse_workers=workers,
+                use_cache=use_cache,
+                incremental=incremental,
+                clone_strategy=clone_strategy,
+                use_result_cache=use_result_cache,
+                progress=forward,
+                executor=parse_pool,
+                clone_slots=clone_slots
+            )
+        except Exception as e:
+            report = {"status": "error", "message": f"Error: {str(e)}"}
+        report.setdefault("url", url)
+        return report
+
+    reports: List[Optional[Dict]] = [None] * len(urls)
+    try:
+        # Enough threads to keep every clone slot and every parse worker busy
+        with ThreadPoolExecutor(max_workers=min(len(urls), clones + workers),
+                                thread_name_prefix="codegenius-batch") as threads:
+            futures = {threads.submit(run_one, url): i for i, url in enumerate(urls)}
+            for future in as_completed(futures):
+                reports[futures[future]] = future.result()
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown()
+
+    elapsed = time.perf_counter() - started
+    completed = [r for r in reports if r["status"] == "completed"]
+    # Cached reports were documented by an earlier run; throughput counts
+    # only the repositories this batch actually cloned and parsed
+    cached = [r for r in completed if r.get("cached")]
+    runs = [r for r in reports if not r.get("cached")]
+    files = sum(r.get("statistics", {}).get("files_analyzed", 0) for r in completed if not r.get("cached"))
+
+    return {
+        "status": "completed",
+        "repositories": reports,
+        "aggregate": {
+            "repositories": len(reports),
+            "completed": len(completed),
+            "failed": len(reports) - len(completed),
+            "cached": len(cached),
+            "files_analyzed": files,
+            "files_cached": sum(r.get("statistics", {}).get("files_analyzed", 0) for r in cached),
+            "clone_concurrency": clones,
+            "parse_workers": workers,
+            "total_time": round(elapsed, 4),
+            "repositories_per_minute": round(len(runs) / max(elapsed, 1e-9) * 60, 2),
+            "files_per_second": round(files / max(elapsed, 1e-9), 2)
+        },
+        "message": f"Documented {len(completed)} of {len(reports)} repositories"
+    }
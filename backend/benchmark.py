@@ -0,0 +1,926 @@
+"""
+Benchmarks for Codebase Genius
+Generates synthetic repositories and times the analysis pipeline
+
+Usage:
+    python benchmark.py suite --sizes 100,1000,5000 --output results.json
+    python benchmark.py suite --baseline baseline.json
+    python benchmark.py compare results.json baseline.json
+    python benchmark.py parse --files 5000 --workers 8
+    python benchmark.py entities --entities 100000
+    python benchmark.py graph --nodes 30000 --edges 150000
+    python benchmark.py summaries --entities 2000 --latency 0.02
+    python benchmark.py docs --size-mb 5
+    python benchmark.py render --size-mb 5
+    python benchmark.py compression --size-mb 5
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence
+
+from utils import (
+    scan_repository, get_python_files, get_jac_files, analyze_files,
+    build_file_tree, parse_python_file, parse_jac_file, build_call_graph,
+    generate_class_diagram, generate_call_graph_diagram, read_document_range
+)
+from doc_index import build_doc_index, save_doc_index, doc_table_of_contents, read_doc_toc
+import artifact_store
+from artifact_store import compress_bytes, decompress_bytes, compress_stored, document_payload, zstd_available
+from entities import build_entity_store
+from summarizer import LocalSummaryModel, SummaryCache, summary_entities, summarize_entities
+from graph_analytics import (
+    build_graph, pagerank, label_propagation, analyze_call_graph, generate_cluster_diagrams
+)
+
+
+# ============================================
+# SYNTHETIC REPOSITORY GENERATOR
+# ============================================
+
+def _package_dir(root: str, dir_index: int, depth: int) -> str:
+    """Leaf directory for dir_index: a pkg_NNNN package with depth-1 levels of sub_N below it"""
+    parts = []
+    rest = dir_index
+    for _ in range(depth - 1):
+        parts.append(f"sub_{rest % 4}")
+        rest //= 4
+    parts.append(f"pkg_{rest:04d}")
+    return os.path.join(root, *reversed(parts))
+
+
+def _jac_module(index: int, rng: random.Random, nodes: int) -> str:
+    lines = [f'"""Synthetic Jac module {index}"""', ""]
+    for n in range(nodes):
+        lines += [
+            f"node Node_{index}_{n} {{",
+            "    has name: str;",
+            "    has count: int = 0;",
+            "}",
+            "",
+        ]
+    lines += [
+        f"walker Walker_{index} {{",
+        "    has visited: int = 0;",
+        "",
+        f"    can visit_{index} with Node_{index}_0 entry {{",
+        "        self.visited += 1;",
+        "        visit [-->];",
+        "    }",
+        "}",
+        "",
+        "with entry {",
+        f"    root ++> Node_{index}_{rng.randrange(nodes)}(name=\"n{index}\");",
+        "}",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def generate_synthetic_repo(
+    root: str,
+    file_count: int = 5000,
+    functions_per_file: int = 8,
+    classes_per_file: int = 2,
+    files_per_dir: int = 50,
+    seed: int = 0,
+    depth: int = 1,
+    calls_per_function: int = 1,
+    jac_fraction: float = 0.0
+) -> Dict:
+    """Write a synthetic repository under root.
+
+    depth is the number of directory levels above each file, calls_per_function
+    the call density, and jac_fraction the share of files written as Jac.
+    """
+    rng = random.Random(seed)
+    total_bytes = 0
+    jac_count = 0
+
+    for index in range(file_count):
+        package_dir = _package_dir(root, index // files_per_dir, max(1, depth))
+        os.makedirs(package_dir, exist_ok=True)
+
+        if rng.random() < jac_fraction:
+            content = _jac_module(index, rng, max(1, classes_per_file))
+            path = os.path.join(package_dir, f"module_{index}.jac")
+            jac_count += 1
+        else:
+            lines = [f'"""Synthetic module {index}"""', "import os", ""]
+            for f in range(functions_per_file):
+                callees = [
+                    f"func_{rng.randrange(file_count)}_{rng.randrange(functions_per_file)}"
+                    for _ in range(calls_per_function)
+                ]
+                lines += [
+                    f"def func_{index}_{f}(value, other=None):",
+                    f'    """Function {f} of module {index}"""',
+                    "    total = 0",
+                    "    for item in range(value):",
+                    "        total += item * 2",
+                ]
+                lines += [f"    total += {callee}(total) if other else 0" for callee in callees]
+                lines += ["    return total", ""]
+            for c in range(classes_per_file):
+                lines += [
+                    f"class Class_{index}_{c}(object):",
+                    f'    """Class {c} of module {index}"""',
+                    "    def __init__(self, value):",
+                    "        self.value = value",
+                    "",
+                    "    def run(self):",
+                    f"        return func_{index}_0(self.value)",
+                    "",
+                ]
+            content = "\n".join(lines)
+            path = os.path.join(package_dir, f"module_{index}.py")
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        total_bytes += len(content)
+
+    return {"root": root, "files": file_count, "jac_files": jac_count, "bytes": total_bytes}
+
+
+# ============================================
+# BENCHMARKS
+# ============================================
+
+def bench_parallel_parse(file_count: int = 5000, workers: Optional[int] = None) -> Dict:
+    """Time serial against process-pool parsing of a synthetic repository"""
+    root = tempfile.mkdtemp(prefix="cg_bench_")
+    try:
+        generate_synthetic_repo(root, file_count=file_count)
+        manifest = scan_repository(root)
+        python_files = get_python_files(root, manifest)
+        jac_files = get_jac_files(root, manifest)
+
+        serial = analyze_files(python_files, jac_files, workers=1)
+        parallel = analyze_files(python_files, jac_files, workers=workers)
+
+        if serial["parsed_files"] != parallel["parsed_files"]:
+            raise AssertionError("parallel parse results differ from serial results")
+
+        return {
+            "files": len(python_files) + len(jac_files),
+            "serial_time": serial["parse_time"],
+            "parallel_time": parallel["parse_time"],
+            "parallel_mode": parallel["mode"],
+            "workers": parallel["workers"],
+            "speedup": round(serial["parse_time"] / max(parallel["parse_time"], 1e-9), 2)
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _synthetic_parsed_files(entity_count: int, per_file: int = 20) -> list:
+    """Parse results shaped like parse_python_file output, without touching disk"""
+    parsed_files = []
+    for start in range(0, entity_count, per_file):
+        index = start // per_file
+        names = range(start, min(start + per_file, entity_count))
+        parsed_files.append({
+            "file": f"/repo/pkg_{index // 50:04d}/module_{index}.py",
+            "functions": [
+                {"name": f"func_{n}", "line_start": n % 500 + 1, "docstring": f"Function {n}"}
+                for n in names if n % 5
+            ],
+            "classes": [
+                {"name": f"Class_{n}", "line_start": n % 500 + 1, "docstring": None}
+                for n in names if not n % 5
+            ]
+        })
+    return parsed_files
+
+
+def _entity_dicts(parsed_files: list) -> list:
+    """The list of entity dicts the pipeline built before EntityStore"""
+    entities = []
+    for parsed in parsed_files:
+        for func in parsed["functions"]:
+            entities.append({"name": func["name"], "type": "function", "file_path": parsed["file"],
+                             "line_start": func["line_start"], "docstring": func.get("docstring", "")})
+        for cls in parsed["classes"]:
+            entities.append({"name": cls["name"], "type": "class", "file_path": parsed["file"],
+                             "line_start": cls["line_start"], "docstring": cls.get("docstring", "")})
+    return entities
+
+
+def bench_entity_store(entity_count: int = 100000) -> Dict:
+    """Memory and statistics time of a list of entity dicts against an EntityStore.
+
+    The parse results stay alive for the whole run (the call graph, code
+    graph, summaries and analysis.json read them), so the memory figures
+    are the peak of parse results plus entities, not the entities alone.
+    """
+    tracemalloc.start()
+    parsed_files = _synthetic_parsed_files(entity_count)
+    parse_bytes = tracemalloc.get_traced_memory()[0]
+    entities = _entity_dicts(parsed_files)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    dict_counts = (len([e for e in entities if e["type"] == "function"]),
+                   len([e for e in entities if e["type"] == "class"]))
+    dict_stats_time = time.perf_counter() - started
+    del entities, parsed_files
+
+    tracemalloc.start()
+    parsed_files = _synthetic_parsed_files(entity_count)
+    store = build_entity_store(parsed_files)
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    store_counts = (store.count("function"), store.count("class"))
+    store_stats_time = time.perf_counter() - started
+
+    if dict_counts != store_counts:
+        raise AssertionError("entity store counts differ from list counts")
+
+    return {
+        "entities": len(store),
+        "parse_bytes": parse_bytes,
+        "dict_bytes": dict_bytes,
+        "store_bytes": store_bytes,
+        "memory_ratio": round(dict_bytes / max(store_bytes, 1), 2),
+        "dict_stats_time": dict_stats_time,
+        "store_stats_time": store_stats_time
+    }
+
+
+def _planted_call_graph(nodes: int, edges: int, cluster_size: int, inside: float,
+                        rng: random.Random) -> Dict:
+    """Call graph shaped like build_call_graph output with planted clusters.
+
+    Nodes are split into blocks of cluster_size; each call stays inside the
+    caller's block with probability inside, so the expected clusters are known.
+    """
+    names = [f"func_{i}" for i in range(nodes)]
+    calls: List[List[str]] = [[] for _ in range(nodes)]
+    for _ in range(edges):
+        caller = rng.randrange(nodes)
+        if rng.random() < inside:
+            block = caller - caller % cluster_size
+            callee = min(nodes - 1, block + rng.randrange(cluster_size))
+        else:
+            callee = rng.randrange(nodes)
+        calls[caller].append(names[callee])
+    return {name: {"calls": called, "file": f"mod_{i // cluster_size}.py"}
+            for i, (name, called) in enumerate(zip(names, calls))}
+
+
+def bench_graph_analytics(nodes: int = 30000, edges: int = 150000, cluster_size: int = 50,
+                          inside: float = 0.9, seed: int = 42) -> Dict:
+    """Ranking, clustering and cluster diagrams on a planted-partition call graph.
+
+    Purity is the share of nodes whose found cluster is mostly from their
+    own planted block. The old top-15 diagram is timed for comparison.
+    """
+    rng = random.Random(seed)
+    call_graph = _planted_call_graph(nodes, edges, cluster_size, inside, rng)
+
+    started = time.perf_counter()
+    graph = build_graph(
+        ((caller, callee) for caller, data in call_graph.items() for callee in data["calls"]),
+        call_graph
+    )
+    build_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    _, rank_iterations = pagerank(graph)
+    rank_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    _, sweeps = label_propagation(graph)
+    cluster_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    analysis = analyze_call_graph(call_graph)
+    diagrams = generate_cluster_diagrams(analysis)
+    total_time = time.perf_counter() - started
+
+    legacy_time = _best_of(lambda: generate_call_graph_diagram(call_graph), 3)
+
+    matched = 0
+    for members in analysis["clusters"]:
+        blocks: Dict[int, int] = {}
+        for node in members:
+            block = int(graph.names[node][5:]) // cluster_size
+            blocks[block] = blocks.get(block, 0) + 1
+        matched += max(blocks.values())
+
+    return {
+        "nodes": graph.node_count,
+        "edges": graph.edge_count,
+        "build_time": build_time,
+        "pagerank_time": rank_time,
+        "pagerank_iterations": rank_iterations,
+        "cluster_time": cluster_time,
+        "cluster_sweeps": sweeps,
+        "clusters": sum(1 for members in analysis["clusters"] if len(members) > 1),
+        "purity": round(matched / max(graph.node_count, 1), 3),
+        "diagrams": len(diagrams),
+        "total_time": total_time,
+        "legacy_diagram_time": legacy_time
+    }
+
+
+def bench_summaries(entity_count: int = 2000, latency: float = 0.02, batch_size: int = 20,
+                    concurrency: int = 4) -> Dict:
+    """Summarization with the local stand-in model: one entity per request vs batched.
+
+    latency is the simulated round trip of each request. Also times a
+    second run answered from the cache and counts fallbacks under a budget
+    that covers about half the work.
+    """
+    entities = summary_entities("", _synthetic_parsed_files(entity_count), "/repo")
+    model = LocalSummaryModel(latency)
+    root = tempfile.mkdtemp(prefix="codegenius-bench-summaries-")
+    try:
+        naive = summarize_entities(entities, model, None, batch_size=1, concurrency=1,
+                                   token_budget=10 ** 9)["stats"]
+        cache = SummaryCache(os.path.join(root, "summary_cache.sqlite"))
+        batched = summarize_entities(entities, model, cache, batch_size, concurrency, 10 ** 9)["stats"]
+        warm = summarize_entities(entities, model, cache, batch_size, concurrency, 10 ** 9)["stats"]
+        cache.close()
+        budgeted = summarize_entities(entities, model, None, batch_size, concurrency,
+                                      batched["tokens_used"] // 2)["stats"]
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "entities": len(entities),
+        "naive": naive,
+        "batched": batched,
+        "warm": warm,
+        "budgeted": budgeted,
+        "speedup": round(naive["time"] / max(batched["time"], 1e-9), 1)
+    }
+
+
+def generate_synthetic_doc(path: str, size_bytes: int, seed: int = 42) -> int:
+    """Write a docs.md shaped like the generated documentation, about size_bytes long.
+
+    Sections and subsections as write_documentation emits them, with the
+    API reference grown to thousands of entries and code fences holding
+    lines that start with '#'. Returns the number of headings written.
+    """
+    rng = random.Random(seed)
+    words = ["graph", "node", "walker", "parse", "index", "cache", "render", "stream",
+             "module", "symbol", "report", "commit", "section", "entity", "batch"]
+    headings = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# synthetic - Documentation\n\n*Generated by Codebase Genius*\n\n---\n\n")
+        f.write("## 📖 Overview\n\n" + " ".join(rng.choice(words) for _ in range(200)) + "\n\n")
+        f.write("## 🚀 Installation\n\n### Clone Repository\n\n```bash\n# clone\ngit clone repo\n```\n\n")
+        f.write("## 📚 API Reference\n\n")
+        headings += 5
+        sections = ("### Modules", "### Functions", "### Classes")
+        per_section = size_bytes // len(sections)
+        for section in sections:
+            f.write(section + "\n\n")
+            headings += 1
+            start = f.tell()
+            n = 0
+            while f.tell() - start < per_section:
+                f.write(f"#### `{rng.choice(words)}_{n}()`\n\n")
+                f.write(" ".join(rng.choice(words) for _ in range(rng.randint(20, 80))) + "\n\n")
+                f.write(f"```python\n# example\n{rng.choice(words)}_{n}()\n```\n\n")
+                f.write(f"**File:** `module_{n // 20}.py` (Line {n % 500 + 1})\n\n")
+                headings += 1
+                n += 1
+        f.write("## 🎨 Architecture Diagrams\n\n### Class Diagram\n\n```mermaid\nclassDiagram\n```\n\n")
+        headings += 2
+    return headings
+
+
+def bench_doc_sections(size_mb: float = 5.0, page_size: int = 256 * 1024) -> Dict:
+    """Whole-document reads vs the section index on a generated document.
+
+    The old View Docs tab fetched every page and passed all of it to
+    st.markdown; with the index the first view only needs the table of
+    contents, and opening a section reads that section's range.
+    """
+    root = tempfile.mkdtemp(prefix="codegenius-bench-docs-")
+    try:
+        doc_path = os.path.join(root, "docs.md")
+        generate_synthetic_doc(doc_path, int(size_mb * 1024 * 1024))
+        doc_size = os.path.getsize(doc_path)
+
+        started = time.perf_counter()
+        offset, pages, full_bytes = 0, 0, 0
+        while True:
+            page = read_document_range(doc_path, offset, page_size)
+            pages += 1
+            full_bytes += len(page["content"].encode('utf-8'))
+            if not page["has_more"]:
+                break
+            offset = page["next_offset"]
+        full_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        index = build_doc_index(doc_path)
+        index_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        toc = doc_table_of_contents(index)
+        toc_bytes = len(json.dumps(toc))
+        toc_time = time.perf_counter() - started
+
+        # Opening a small section and the first page of the largest one
+        entries = toc["entries"]
+        small = min(entries, key=lambda entry: entry["end"] - entry["offset"])
+        large = max(entries, key=lambda entry: entry["end"] - entry["offset"])
+        started = time.perf_counter()
+        small_page = read_document_range(doc_path, small["offset"], page_size, small["end"])
+        small_time = time.perf_counter() - started
+        started = time.perf_counter()
+        large_page = read_document_range(doc_path, large["offset"], page_size, large["end"])
+        large_time = time.perf_counter() - started
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "doc_size": doc_size,
+        "headings": len(index["offsets"]),
+        "full_pages": pages,
+        "full_bytes": full_bytes,
+        "full_time": round(full_time, 4),
+        "index_time": round(index_time, 4),
+        "toc_entries": len(entries),
+        "toc_bytes": toc_bytes,
+        "toc_time": round(toc_time, 4),
+        "small_section": small["title"],
+        "small_bytes": len(small_page["content"].encode('utf-8')),
+        "small_time": round(small_time, 4),
+        "large_section": large["title"],
+        "large_section_size": large["end"] - large["offset"],
+        "large_page_bytes": len(large_page["content"].encode('utf-8')),
+        "large_time": round(large_time, 4)
+    }
+
+
+class _LocalResponse:
+    def __init__(self, status_code: int, body: Dict):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self) -> Dict:
+        return self._body
+
+
+def bench_doc_render(size_mb: float = 5.0, app_path: Optional[str] = None) -> Dict:
+    """Time the View Docs tab of the Streamlit app on a generated document.
+
+    Runs frontend/app.py under Streamlit's AppTest. Its walker calls are
+    answered in-process from the same functions the walkers use, so the
+    timings leave out the network and measure the app's own work. "whole"
+    is the path for servers without a section index: every page is fetched
+    and passed to one st.markdown, as the tab did before the index. "sections"
+    is the table of contents, then opening the largest section. AppTest
+    has no browser, so the Markdown handed to st.markdown stands in for the
+    browser's paint cost, which grows with it.
+    """
+    try:
+        import requests
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        raise RuntimeError("benchmark.py render needs the frontend requirements (streamlit, requests)")
+
+    app_path = app_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend", "app.py")
+    repo_name = "synthetic"
+    root = tempfile.mkdtemp(prefix="codegenius-bench-render-")
+    cwd = os.getcwd()
+    original_post = requests.Session.post
+    with_index = [False]
+
+    def local_post(session, url, json=None, **kwargs):
+        # Walker responses as main.jac builds them, without ETags
+        payload = json or {}
+        walker = url.rsplit('/', 1)[-1]
+        if walker == "get_doc_sections":
+            if not with_index[0]:
+                return _LocalResponse(404, {})
+            return _LocalResponse(200, {"reports": [read_doc_toc(payload["repo_name"], payload.get("max_level", 3))]})
+        if walker == "get_documentation":
+            doc_path = os.path.join("outputs", payload["repo_name"], "docs.md")
+            page = read_document_range(doc_path, payload.get("offset", 0),
+                                       payload.get("limit", 256 * 1024), payload.get("end", 0))
+            return _LocalResponse(200, {"reports": [{"status": "success", **page}]})
+        return _LocalResponse(200, {"reports": [[]]})
+
+    def markdown_bytes(at) -> int:
+        return sum(len(element.value.encode('utf-8')) for element in at.markdown)
+
+    def view_docs(at) -> tuple:
+        at.run()
+        [box for box in at.text_input if box.label == "Repository Name"][0].set_value(repo_name)
+        base = markdown_bytes(at)
+        started = time.perf_counter()
+        [button for button in at.button if "View Docs" in button.label][0].click().run()
+        elapsed = time.perf_counter() - started
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return elapsed, markdown_bytes(at) - base, base
+
+    try:
+        output_dir = os.path.join(root, "outputs", repo_name)
+        os.makedirs(output_dir)
+        generate_synthetic_doc(os.path.join(output_dir, "docs.md"), int(size_mb * 1024 * 1024))
+        doc_size = os.path.getsize(os.path.join(output_dir, "docs.md"))
+        # Saved by the pipeline's save stage
+        save_doc_index(output_dir, build_doc_index(os.path.join(output_dir, "docs.md")))
+        os.chdir(root)
+        requests.Session.post = local_post
+
+        at = AppTest.from_file(app_path, default_timeout=600)
+        whole_time, whole_bytes, _ = view_docs(at)
+        started = time.perf_counter()
+        at.run()
+        whole_rerun_time = time.perf_counter() - started
+
+        with_index[0] = True
+        at = AppTest.from_file(app_path, default_timeout=600)
+        toc_time, toc_bytes, base = view_docs(at)
+        started = time.perf_counter()
+        at.run()
+        toc_rerun_time = time.perf_counter() - started
+        toc = read_doc_toc(repo_name)
+        large = max(toc["entries"], key=lambda entry: entry["end"] - entry["offset"])
+        toggle = [t for t in at.toggle if t.key.endswith(":" + str(large["section"]))][0]
+        started = time.perf_counter()
+        toggle.set_value(True).run()
+        open_time = time.perf_counter() - started
+        open_bytes = markdown_bytes(at) - base - toc_bytes
+    finally:
+        requests.Session.post = original_post
+        os.chdir(cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "doc_size": doc_size,
+        "whole_time": round(whole_time, 3),
+        "whole_bytes": whole_bytes,
+        "whole_rerun_time": round(whole_rerun_time, 3),
+        "toc_time": round(toc_time, 3),
+        "toc_bytes": toc_bytes,
+        "toc_entries": len(toc["entries"]),
+        "toc_rerun_time": round(toc_rerun_time, 3),
+        "large_section": large["title"],
+        "open_time": round(open_time, 3),
+        "open_bytes": open_bytes
+    }
+
+
+def _cpu_time(fn: Callable[[], object], repeats: int = 3) -> float:
+    """Best CPU time of fn over repeats (process_time, so I/O waits do not count)"""
+    best = float("inf")
+    for _ in range(max(1, repeats)):
+        started = time.process_time()
+        fn()
+        best = min(best, time.process_time() - started)
+    return best
+
+
+def bench_compression(size_mb: float = 5.0, entity_count: int = 50000, repeats: int = 3) -> Dict:
+    """Stored size and CPU cost of each codec on a generated doc and analysis artifact.
+
+    Also compares the JSON report a client downloads for the whole doc
+    (decoded text vs the stored bytes as base64) and the first page read
+    from a compressed doc, cold (decoding it) and warm (decoded copy cached).
+    """
+    root = tempfile.mkdtemp(prefix="codegenius-bench-compression-")
+    try:
+        doc_path = os.path.join(root, "docs.md")
+        generate_synthetic_doc(doc_path, int(size_mb * 1024 * 1024))
+        with open(doc_path, 'rb') as f:
+            doc = f.read()
+        analysis = json.dumps({"parsed_files": _synthetic_parsed_files(entity_count)},
+                              separators=(',', ':')).encode('utf-8')
+
+        codecs = [("gzip", 1), ("gzip", 6), ("gzip", 9)]
+        if zstd_available():
+            codecs += [("zstd", 3), ("zstd", 10), ("zstd", 19)]
+        rows = []
+        for codec, level in codecs:
+            for label, data in (("docs.md", doc), ("analysis.json", analysis)):
+                packed = compress_bytes(data, codec, level)
+                rows.append({
+                    "artifact": label,
+                    "codec": codec,
+                    "level": level,
+                    "size": len(data),
+                    "stored_size": len(packed),
+                    "ratio": round(len(data) / max(len(packed), 1), 2),
+                    "compress_cpu": round(_cpu_time(lambda: compress_bytes(data, codec, level), repeats), 4),
+                    "decompress_cpu": round(_cpu_time(lambda: decompress_bytes(packed, codec), repeats), 4)
+                })
+
+        # The whole-doc report, and paging a doc stored with the default codec
+        codec = "zstd" if zstd_available() else "gzip"
+        plain_report = len(json.dumps(document_payload(doc_path)))
+        compress_stored(doc_path, codec)
+        passthrough_report = len(json.dumps(document_payload(doc_path, codec)))
+        artifact_store._decoded.clear()
+        started = time.perf_counter()
+        read_document_range(doc_path, 0, 256 * 1024)
+        cold_page = time.perf_counter() - started
+        started = time.perf_counter()
+        read_document_range(doc_path, len(doc) // 2, 256 * 1024)
+        warm_page = time.perf_counter() - started
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "zstd": zstd_available(),
+        "rows": rows,
+        "report_codec": codec,
+        "plain_report_bytes": plain_report,
+        "passthrough_report_bytes": passthrough_report,
+        "cold_page_time": round(cold_page, 4),
+        "warm_page_time": round(warm_page, 4)
+    }
+
+
+# ============================================
+# BENCHMARK SUITE
+# ============================================
+
+SUITE_SIZES = (100, 1000, 5000)
+# A benchmark is a regression when it is this many times slower than the baseline
+DEFAULT_THRESHOLD = 1.25
+# Timings below this many seconds are too noisy to compare
+MIN_COMPARABLE_SECONDS = 0.005
+
+
+def _best_of(fn: Callable[[], object], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeats)):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _record(seconds: float, items: int) -> Dict:
+    return {
+        "seconds": round(seconds, 6),
+        "items": items,
+        "per_item_us": round(seconds / max(items, 1) * 1e6, 3)
+    }
+
+
+def run_suite(sizes: Sequence[int] = SUITE_SIZES, repeats: int = 3, **shape) -> Dict:
+    """Time the utils stages on a synthetic repository of each size.
+
+    shape is passed to generate_synthetic_repo (depth, functions_per_file,
+    classes_per_file, calls_per_function, jac_fraction, ...). Each result
+    is the best of repeats runs.
+    """
+    results = {}
+    for size in sizes:
+        root = tempfile.mkdtemp(prefix="cg_bench_")
+        try:
+            generate_synthetic_repo(root, file_count=size, **shape)
+            manifest = scan_repository(root)
+            python_files = get_python_files(root, manifest)
+            jac_files = get_jac_files(root, manifest)
+
+            parsed_python = [parse_python_file(p) for p in python_files]
+            parsed_jac = [parse_jac_file(p) for p in jac_files]
+            call_graph = build_call_graph(parsed_python)
+            parsed_all = parsed_python + parsed_jac
+
+            timings = {
+                "build_file_tree": (lambda: build_file_tree(root, 5), manifest["file_count"]),
+                "parse_python_file": (lambda: [parse_python_file(p) for p in python_files], len(python_files)),
+                "parse_jac_file": (lambda: [parse_jac_file(p) for p in jac_files], len(jac_files)),
+                "build_call_graph": (lambda: build_call_graph(parsed_python), len(parsed_python)),
+                "generate_class_diagram": (lambda: generate_class_diagram(parsed_all), len(parsed_all)),
+                "generate_call_graph_diagram": (lambda: generate_call_graph_diagram(call_graph), len(call_graph)),
+                "analyze_call_graph": (lambda: analyze_call_graph(call_graph, parsed_python), len(call_graph)),
+            }
+            for name, (fn, items) in timings.items():
+                if items:
+                    results[f"{name}[{size}]"] = _record(_best_of(fn, repeats), items)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeats": repeats
+        },
+        "sizes": list(sizes),
+        "shape": shape,
+        "results": results
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """Per-benchmark ratio of current to baseline time, flagging regressions"""
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        ratio = result["seconds"] / max(base["seconds"], 1e-9)
+        if max(result["seconds"], base["seconds"]) < MIN_COMPARABLE_SECONDS:
+            status = "ok"
+        elif ratio > threshold:
+            status = "regression"
+        elif ratio < 1 / threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({
+            "benchmark": name,
+            "baseline": base["seconds"],
+            "current": result["seconds"],
+            "ratio": round(ratio, 3),
+            "status": status
+        })
+    return rows
+
+
+def _print_comparison(rows: List[Dict]) -> int:
+    """Print the comparison table; returns the number of regressions"""
+    for row in rows:
+        marker = {"regression": "REGRESSION", "improvement": "faster"}.get(row["status"], "")
+        print(f"{row['benchmark']:<40} {row['baseline']:>10.4f}s {row['current']:>10.4f}s "
+              f"{row['ratio']:>7.2f}x  {marker}")
+    return sum(1 for row in rows if row["status"] == "regression")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Codebase Genius benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    parse_cmd = sub.add_parser("parse", help="serial vs parallel parsing")
+    parse_cmd.add_argument("--files", type=int, default=5000)
+    parse_cmd.add_argument("--workers", type=int, default=None)
+
+    entities_cmd = sub.add_parser("entities", help="entity dicts vs EntityStore")
+    entities_cmd.add_argument("--entities", type=int, default=100000)
+
+    graph_cmd = sub.add_parser("graph", help="call graph ranking and clustering")
+    graph_cmd.add_argument("--nodes", type=int, default=30000)
+    graph_cmd.add_argument("--edges", type=int, default=150000)
+    graph_cmd.add_argument("--cluster-size", type=int, default=50)
+
+    summaries_cmd = sub.add_parser("summaries", help="batched, cached LLM summaries with the local model")
+    summaries_cmd.add_argument("--entities", type=int, default=2000)
+    summaries_cmd.add_argument("--latency", type=float, default=0.02)
+    summaries_cmd.add_argument("--batch", type=int, default=20)
+    summaries_cmd.add_argument("--concurrency", type=int, default=4)
+
+    docs_cmd = sub.add_parser("docs", help="whole-document reads vs the section index")
+    docs_cmd.add_argument("--size-mb", type=float, default=5.0)
+
+    render_cmd = sub.add_parser("render", help="View Docs tab render time, whole document vs sections")
+    render_cmd.add_argument("--size-mb", type=float, default=5.0)
+    render_cmd.add_argument("--app", default=None, help="path to frontend/app.py")
+
+    compression_cmd = sub.add_parser("compression", help="stored size and CPU cost of gzip and zstd")
+    compression_cmd.add_argument("--size-mb", type=float, default=5.0)
+    compression_cmd.add_argument("--entities", type=int, default=50000)
+
+    suite_cmd = sub.add_parser("suite", help="utils stages at several repository sizes")
+    suite_cmd.add_argument("--sizes", default=",".join(str(size) for size in SUITE_SIZES))
+    suite_cmd.add_argument("--repeats", type=int, default=3)
+    suite_cmd.add_argument("--depth", type=int, default=3)
+    suite_cmd.add_argument("--functions", type=int, default=8)
+    suite_cmd.add_argument("--classes", type=int, default=2)
+    suite_cmd.add_argument("--calls", type=int, default=2)
+    suite_cmd.add_argument("--jac-fraction", type=float, default=0.1)
+    suite_cmd.add_argument("--output", default=None, help="write results as JSON")
+    suite_cmd.add_argument("--baseline", default=None, help="compare against a stored results file")
+    suite_cmd.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    compare_cmd = sub.add_parser("compare", help="compare two stored suite results")
+    compare_cmd.add_argument("current")
+    compare_cmd.add_argument("baseline")
+    compare_cmd.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "suite":
+        result = run_suite(
+            [int(size) for size in args.sizes.split(",") if size],
+            repeats=args.repeats,
+            depth=args.depth,
+            functions_per_file=args.functions,
+            classes_per_file=args.classes,
+            calls_per_function=args.calls,
+            jac_fraction=args.jac_fraction
+        )
+        for name, record in result["results"].items():
+            print(f"{name:<40} {record['seconds']:>10.4f}s {record['per_item_us']:>10.1f} us/item")
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2)
+        if args.baseline:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            print()
+            if _print_comparison(compare_results(result, baseline, args.threshold)):
+                return 1
+    elif args.command == "compare":
+        with open(args.current, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if _print_comparison(compare_results(current, baseline, args.threshold)):
+            return 1
+    elif args.command == "parse":
+        result = bench_parallel_parse(args.files, args.workers)
+        print(f"Files parsed:   {result['files']}")
+        print(f"Serial:         {result['serial_time']:.2f}s")
+        print(f"Parallel:       {result['parallel_time']:.2f}s "
+              f"({result['parallel_mode']}, {result['workers']} workers)")
+        print(f"Speedup:        {result['speedup']}x")
+    elif args.command == "entities":
+        result = bench_entity_store(args.entities)
+        print(f"Entities:       {result['entities']}")
+        print(f"Parse results:  {result['parse_bytes'] / 1024 / 1024:.1f} MB")
+        print(f"List of dicts:  {result['dict_bytes'] / 1024 / 1024:.1f} MB, "
+              f"stats {result['dict_stats_time'] * 1000:.2f} ms")
+        print(f"EntityStore:    {result['store_bytes'] / 1024 / 1024:.1f} MB, "
+              f"stats {result['store_stats_time'] * 1000:.4f} ms")
+        print(f"Peak ratio:     {result['memory_ratio']}x (parse results included)")
+    elif args.command == "graph":
+        result = bench_graph_analytics(args.nodes, args.edges, args.cluster_size)
+        print(f"Graph:          {result['nodes']} nodes, {result['edges']} edges")
+        print(f"Build CSR:      {result['build_time'] * 1000:.1f} ms")
+        print(f"PageRank:       {result['pagerank_time'] * 1000:.1f} ms "
+              f"({result['pagerank_iterations']} iterations)")
+        print(f"Clustering:     {result['cluster_time'] * 1000:.1f} ms "
+              f"({result['cluster_sweeps']} sweeps, {result['clusters']} clusters, "
+              f"purity {result['purity']})")
+        print(f"Full analysis:  {result['total_time'] * 1000:.1f} ms, {result['diagrams']} diagrams")
+        print(f"Old diagram:    {result['legacy_diagram_time'] * 1000:.1f} ms")
+    elif args.command == "summaries":
+        result = bench_summaries(args.entities, args.latency, args.batch, args.concurrency)
+        print(f"Entities:       {result['entities']}")
+        for label, key in (("One per call:", "naive"), ("Batched:", "batched"),
+                           ("Warm cache:", "warm"), ("Half budget:", "budgeted")):
+            stats = result[key]
+            print(f"{label:<15} {stats['time']:.2f}s, {stats['requests']} requests, "
+                  f"{stats['tokens_used']} tokens, {stats['cache_hits']} cached, "
+                  f"{stats['fallbacks']} fallbacks")
+        print(f"Speedup:        {result['speedup']}x")
+    elif args.command == "docs":
+        result = bench_doc_sections(args.size_mb)
+        print(f"Document:       {result['doc_size'] / 1024 / 1024:.1f} MB, {result['headings']} headings")
+        print(f"Whole doc:      {result['full_time'] * 1000:.1f} ms, {result['full_pages']} pages, "
+              f"{result['full_bytes'] / 1024:.0f} KB to render")
+        print(f"Build index:    {result['index_time'] * 1000:.1f} ms")
+        print(f"Contents:       {result['toc_time'] * 1000:.1f} ms, {result['toc_entries']} entries, "
+              f"{result['toc_bytes'] / 1024:.1f} KB")
+        print(f"Small section:  {result['small_time'] * 1000:.2f} ms, {result['small_bytes']} bytes "
+              f"({result['small_section']})")
+        print(f"Large section:  {result['large_time'] * 1000:.2f} ms, first page "
+              f"{result['large_page_bytes'] / 1024:.0f} KB of {result['large_section_size'] / 1024:.0f} KB "
+              f"({result['large_section']})")
+    elif args.command == "render":
+        result = bench_doc_render(args.size_mb, args.app)
+        print(f"Document:       {result['doc_size'] / 1024 / 1024:.1f} MB")
+        print(f"Whole doc:      {result['whole_time']:.2f} s to view, "
+              f"{result['whole_bytes'] / 1024:.0f} KB of Markdown; rerun {result['whole_rerun_time']:.2f} s")
+        print(f"Sections:       {result['toc_time']:.2f} s to view ({result['toc_entries']} entries), "
+              f"{result['toc_bytes'] / 1024:.1f} KB of Markdown; rerun {result['toc_rerun_time']:.2f} s")
+        print(f"Open section:   {result['open_time']:.2f} s, {result['open_bytes'] / 1024:.0f} KB "
+              f"({result['large_section']})")
+    elif args.command == "compression":
+        result = bench_compression(args.size_mb, args.entities)
+        if not result["zstd"]:
+            print("zstd:           skipped (zstandard is not installed)")
+        print(f"{'artifact':<15}{'codec':<10}{'size':>10}{'stored':>10}{'ratio':>8}"
+              f"{'compress':>11}{'decompress':>12}")
+        for row in result["rows"]:
+            print(f"{row['artifact']:<15}{row['codec'] + ' ' + str(row['level']):<10}"
+                  f"{row['size'] / 1024:>8.0f}KB{row['stored_size'] / 1024:>8.0f}KB{row['ratio']:>7.1f}x"
+                  f"{row['compress_cpu'] * 1000:>9.0f}ms{row['decompress_cpu'] * 1000:>10.1f}ms")
+        print(f"Whole-doc report: {result['plain_report_bytes'] / 1024:.0f} KB decoded, "
+              f"{result['passthrough_report_bytes'] / 1024:.0f} KB as stored {result['report_codec']} (base64)")
+        print(f"First page:       {result['cold_page_time'] * 1000:.1f} ms cold, "
+              f"{result['warm_page_time'] * 1000:.2f} ms with the decoded copy cached")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
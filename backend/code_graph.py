@@ -0,0 +1,185 @@
+"""
+Code context graph for Codebase Genius
+Files, modules, classes and functions of a documented repository and the
+contains, calls, inherits and imports relationships between them, saved
+next to the documentation so main.jac can rebuild the graph without parsing
+"""
+
+import os
+import json
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from search_index import qualified_name
+from artifact_store import open_stored, write_stored
+
+
+CODE_GRAPH_FILENAME = "code_graph.json"
+CODE_GRAPH_VERSION = 1
+# A call to a name defined in many places is linked to at most this many of them
+MAX_CALL_TARGETS = 10
+# Limits for the traversal walkers in main.jac
+MAX_IMPACT_DEPTH = 10
+MAX_GRAPH_RESULTS = 1000
+
+
+def _add_adjacency(adjacency: Dict[int, List[int]], source: int, targets: List[int]) -> None:
+    known = adjacency[source]
+    for target in targets:
+        if target != source and target not in known:
+            known.append(target)
+
+
+def build_code_graph(parsed_files: List[Dict], repo_root: str, commit: str = "") -> Dict:
+    """Build the code context graph from parse results.
+
+    Symbols (classes and functions) are one columnar table; a method's
+    owner is the innermost class whose lines contain it. Calls and bases
+    are resolved by name, preferring the caller's class, then its file,
+    then every definition of the name. Relationships are stored as
+    [source, [targets]] lists so main.jac connects each source in one call.
+    """
+    files: List[str] = []
+    languages: List[str] = []
+    kinds: List[str] = []
+    names: List[str] = []
+    qualified: List[str] = []
+    symbol_files: List[int] = []
+    line_starts: List[int] = []
+    line_ends: List[int] = []
+    owners: List[int] = []
+    calls_by_symbol: Dict[int, List[str]] = {}
+    bases_by_symbol: Dict[int, List[str]] = {}
+    by_name: Dict[str, List[int]] = defaultdict(list)
+    modules: Dict[str, int] = {}
+    imports: Dict[int, List[int]] = defaultdict(list)
+
+    def add_symbol(kind, name, file_index, start, end, owner):
+        symbol = len(names)
+        kinds.append(kind)
+        names.append(name)
+        qualified.append(names[owner] + "." + name if owner >= 0 else name)
+        symbol_files.append(file_index)
+        line_starts.append(start)
+        line_ends.append(end)
+        owners.append(owner)
+        by_name[name].append(symbol)
+        return symbol
+
+    for parsed in parsed_files:
+        if parsed.get("error"):
+            continue
+        file_index = len(files)
+        files.append(os.path.relpath(parsed["file"], repo_root).replace(os.sep, '/'))
+
+        if "functions" in parsed:
+            languages.append("python")
+            # One sweep in line order with a stack of the classes still open,
+            # so a method or nested class is owned by the innermost one
+            items = [(c["line_start"], 0, c) for c in parsed.get("classes", [])]
+            items.extend((f["line_start"], 1, f) for f in parsed["functions"])
+            items.sort(key=lambda item: item[:2])
+            open_classes = []
+            for start, is_function, item in items:
+                while open_classes and open_classes[-1][0] < start:
+                    open_classes.pop()
+                owner = open_classes[-1][1] if open_classes else -1
+                if is_function:
+                    symbol = add_symbol("function", item["name"], file_index, start, item["line_end"], owner)
+                    calls_by_symbol[symbol] = item.get("calls", [])
+                else:
+                    symbol = add_symbol("class", item["name"], file_index, start, item["line_end"], owner)
+                    bases_by_symbol[symbol] = item.get("bases", [])
+                    open_classes.append((item["line_end"], symbol))
+            for imported in parsed.get("imports", []):
+                module = imported.get("module") or "."
+                module_index = modules.setdefault(module, len(modules))
+                if module_index not in imports[file_index]:
+                    imports[file_index].append(module_index)
+        else:
+            # The Jac parser finds names only, without line spans to place symbols
+            languages.append("jac")
+
+    def resolve(name: str, symbol: int, want_class: bool) -> List[int]:
+        candidates = by_name.get(name, [])
+        if want_class:
+            candidates = [s for s in candidates if kinds[s] != "function"]
+        if len(candidates) <= 1:
+            return candidates
+        owner = owners[symbol]
+        if owner >= 0:
+            siblings = [s for s in candidates if owners[s] == owner]
+            if siblings:
+                return siblings
+        local = [s for s in candidates if symbol_files[s] == symbol_files[symbol]]
+        return local or candidates[:MAX_CALL_TARGETS]
+
+    calls: Dict[int, List[int]] = defaultdict(list)
+    for symbol, called in calls_by_symbol.items():
+        for name in called:
+            _add_adjacency(calls, symbol, resolve(name, symbol, False))
+    inherits: Dict[int, List[int]] = defaultdict(list)
+    for symbol, bases in bases_by_symbol.items():
+        for base in bases:
+            _add_adjacency(inherits, symbol, resolve(base, symbol, True))
+
+    # Imported modules that are files of the repository point at that file;
+    # trailing parts of the dotted path match imports relative to a subdirectory
+    module_files: Dict[str, int] = {}
+    for depth in range(max((path.count('/') for path in files), default=0) + 1):
+        for i, path in enumerate(files):
+            if path.endswith(".py"):
+                parts = qualified_name(path, "")[:-1].split('.')
+                if depth < len(parts):
+                    module_files.setdefault(".".join(parts[depth:]), i)
+
+    return {
+        "version": CODE_GRAPH_VERSION,
+        "commit": commit,
+        "files": files,
+        "languages": languages,
+        "modules": list(modules),
+        "module_files": [module_files.get(module.lstrip("."), -1) for module in modules],
+        "symbols": {
+            "kinds": kinds,
+            "names": names,
+            "qualified": qualified,
+            "files": symbol_files,
+            "line_starts": line_starts,
+            "line_ends": line_ends,
+            "owners": owners
+        },
+        "calls": [[s, t] for s, t in calls.items() if t],
+        "inherits": [[s, t] for s, t in inherits.items() if t],
+        "imports": [[f, m] for f, m in imports.items()]
+    }
+
+
+def code_graph_size(graph: Dict) -> Dict:
+    """Node and edge counts of a code graph payload"""
+    symbols = len(graph["symbols"]["names"])
+    edges = sum(len(targets) for key in ("calls", "inherits", "imports") for _, targets in graph[key])
+    # Every symbol is contained by its file or its class
+    return {
+        "nodes": len(graph["files"]) + len(graph["modules"]) + symbols,
+        "edges": edges + symbols
+    }
+
+
+def save_code_graph(output_dir: str, graph: Dict) -> str:
+    """Write the code graph next to the documentation (compressed if configured)"""
+    data = json.dumps(graph, separators=(',', ':')).encode('utf-8')
+    return write_stored(os.path.join(output_dir, CODE_GRAPH_FILENAME), data)
+
+
+def load_code_graph(repo_name: str) -> Optional[Dict]:
+    """The saved code graph of a documented repository, or None"""
+    path = os.path.join("outputs", repo_name, CODE_GRAPH_FILENAME)
+    try:
+        with open_stored(path) as f:
+            graph = json.load(f)
+    except (OSError, EOFError, ValueError):
+        return None
+    if graph.get("version") != CODE_GRAPH_VERSION:
+        return None
+    return graph
@@ -0,0 +1,169 @@
+"""
+Section index for Codebase Genius documentation
+Byte offset, level, title and size of every heading in a generated docs.md,
+saved next to it, so clients can show a table of contents and read only
+the sections that are opened
+"""
+
+import os
+import re
+import json
+from typing import Dict, Optional
+
+from artifact_store import stored_path, open_stored
+
+
+DOC_FILENAME = "docs.md"
+DOC_INDEX_FILENAME = "docs_index.json"
+DOC_INDEX_VERSION = 2
+# Headings listed in a table of contents by default: the document title,
+# its sections (##) and their subsections (###)
+DEFAULT_TOC_LEVEL = 3
+MAX_TOC_ENTRIES = 2000
+
+_HEADING = re.compile(rb'^(#{1,6})[ \t]+(.*?)[ \t#]*\r?\n?$')
+
+
+def build_doc_index(doc_path: str) -> Dict:
+    """Build the section index of a Markdown document in one pass.
+
+    Headings inside code fences are skipped. A section's size runs from
+    its heading to the next heading of the same or a higher level, so it
+    includes its subsections. Offsets are in the decoded document when it
+    is stored compressed.
+    """
+    levels, titles, offsets = [], [], []
+    in_fence = False
+    position = 0
+    with open_stored(doc_path) as f:
+        for line in f:
+            if line.startswith(b'```'):
+                in_fence = not in_fence
+            elif not in_fence and line.startswith(b'#'):
+                match = _HEADING.match(line)
+                if match:
+                    levels.append(len(match.group(1)))
+                    titles.append(match.group(2).decode('utf-8', errors='replace'))
+                    offsets.append(position)
+            position += len(line)
+
+    # Close each section at the next heading that is not nested in it
+    sizes = [0] * len(levels)
+    open_sections = []
+    for i, level in enumerate(levels):
+        while open_sections and levels[open_sections[-1]] >= level:
+            closed = open_sections.pop()
+            sizes[closed] = offsets[i] - offsets[closed]
+        open_sections.append(i)
+    for closed in open_sections:
+        sizes[closed] = position - offsets[closed]
+
+    stat = os.stat(stored_path(doc_path)[0])
+    return {
+        "version": DOC_INDEX_VERSION,
+        "doc_size": position,
+        "stored_size": stat.st_size,
+        "doc_mtime": stat.st_mtime_ns,
+        "levels": levels,
+        "titles": titles,
+        "offsets": offsets,
+        "sizes": sizes
+    }
+
+
+def save_doc_index(output_dir: str, index: Dict) -> str:
+    """Write the section index next to the documentation"""
+    path = os.path.join(output_dir, DOC_INDEX_FILENAME)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def load_doc_index(output_dir: str) -> Optional[Dict]:
+    """The section index of a stored document, rebuilt if missing or stale"""
+    doc_path = os.path.join(output_dir, DOC_FILENAME)
+    found = stored_path(doc_path)
+    try:
+        stat = os.stat(found[0]) if found else None
+    except OSError:
+        stat = None
+    if stat is None:
+        return None
+
+    try:
+        with open(os.path.join(output_dir, DOC_INDEX_FILENAME), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = None
+    if (index is not None and index.get("version") == DOC_INDEX_VERSION
+            and index.get("stored_size") == stat.st_size and index.get("doc_mtime") == stat.st_mtime_ns):
+        return index
+
+    # Documents written before the index existed, or replaced since
+    index = build_doc_index(doc_path)
+    try:
+        save_doc_index(output_dir, index)
+    except OSError:
+        pass
+    return index
+
+
+def doc_table_of_contents(index: Dict, max_level: int = DEFAULT_TOC_LEVEL,
+                          limit: int = MAX_TOC_ENTRIES) -> Dict:
+    """Headings down to max_level, each with the byte range it shows on its own.
+
+    An entry's end is the offset of the next listed heading, so the ranges
+    of all entries cover the document without overlap; size is the whole
+    section including its subsections. Past limit headings, one last entry
+    (remaining: true) covers the rest of the document, so every section
+    can still be read.
+    """
+    levels, offsets = index["levels"], index["offsets"]
+    listed = [i for i, level in enumerate(levels) if level <= max_level]
+    entries = []
+    for n, i in enumerate(listed[:limit]):
+        entries.append({
+            "section": i,
+            "level": levels[i],
+            "title": index["titles"][i],
+            "offset": offsets[i],
+            "end": offsets[listed[n + 1]] if n + 1 < len(listed) else index["doc_size"],
+            "size": index["sizes"][i]
+        })
+    truncated = len(listed) > limit
+    if truncated:
+        first = listed[limit]
+        entries.append({
+            "section": first,
+            "level": 1,
+            "title": "Remaining " + str(len(listed) - limit) + " sections",
+            "offset": offsets[first],
+            "end": index["doc_size"],
+            "size": index["doc_size"] - offsets[first],
+            "remaining": True
+        })
+    # Text before the first heading is shown with the first entry
+    if entries:
+        entries[0]["offset"] = 0
+    return {
+        "entries": entries,
+        "total_size": index["doc_size"],
+        "section_count": len(levels),
+        "truncated": truncated
+    }
+
+
+def read_doc_toc(repo_name: str, max_level: int = DEFAULT_TOC_LEVEL) -> Dict:
+    """Table of contents of a documented repository"""
+    index = load_doc_index(os.path.join("outputs", repo_name))
+    if index is None:
+        return {
+            "status": "error",
+            "message": "Documentation not found"
+        }
+    max_level = max(1, min(max_level or DEFAULT_TOC_LEVEL, 6))
+    return {
+        "status": "success",
+        **doc_table_of_contents(index, max_level)
+    }
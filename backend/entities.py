@@ -0,0 +1,135 @@
+"""
+Entity store for Codebase Genius
+Holds every function and class found by the CodeAnalyzer in compact columns
+instead of one dict per entity
+"""
+
+import sys
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+
+# Entity types, stored as one byte per entity in the "types" column
+ENTITY_TYPES = ("function", "class")
+_TYPE_CODES = {name: code for code, name in enumerate(ENTITY_TYPES)}
+
+
+class Entity:
+    """Read-only view of one stored entity, built on demand by the iterators"""
+
+    __slots__ = ("name", "type", "file_path", "line_start", "docstring")
+
+    def __init__(self, name: str, type: str, file_path: str, line_start: int, docstring: Optional[str]):
+        self.name = name
+        self.type = type
+        self.file_path = file_path
+        self.line_start = line_start
+        self.docstring = docstring
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "type": self.type,
+            "file_path": self.file_path,
+            "line_start": self.line_start,
+            "docstring": self.docstring or ""
+        }
+
+
+class EntityStore:
+    """Columnar store of functions and classes.
+
+    Each attribute lives in its own column: names and docstrings in lists,
+    types, file indexes and line numbers in typed arrays. File paths are
+    stored once and referenced by index, and per-type counts are kept up
+    to date on insert, so statistics never rescan the store.
+    """
+
+    def __init__(self):
+        self._names: List[str] = []
+        self._docstrings: List[Optional[str]] = []
+        self._types = array('B')
+        self._files = array('I')
+        self._lines = array('I')
+        self._paths: List[str] = []
+        self._path_index: Dict[str, int] = {}
+        self._counts = [0] * len(ENTITY_TYPES)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _intern_path(self, file_path: str) -> int:
+        index = self._path_index.get(file_path)
+        if index is None:
+            index = len(self._paths)
+            self._paths.append(sys.intern(file_path))
+            self._path_index[file_path] = index
+        return index
+
+    def add(self, name: str, type: str, file_path: str, line_start: int, docstring: Optional[str] = None) -> None:
+        """Append one entity; type must be one of ENTITY_TYPES"""
+        code = _TYPE_CODES[type]
+        self._names.append(name)
+        # Empty docstrings are stored as None so they cost no string object
+        self._docstrings.append(docstring or None)
+        self._types.append(code)
+        self._files.append(self._intern_path(file_path))
+        self._lines.append(line_start or 0)
+        self._counts[code] += 1
+
+    def add_parsed(self, parsed: Dict) -> None:
+        """Add the functions and classes of one parse_python_file result"""
+        file_path = parsed["file"]
+        for func in parsed.get("functions", []):
+            self.add(func["name"], "function", file_path, func["line_start"], func.get("docstring"))
+        for cls in parsed.get("classes", []):
+            self.add(cls["name"], "class", file_path, cls["line_start"], cls.get("docstring"))
+
+    def count(self, type: Optional[str] = None) -> int:
+        """Number of entities of the given type (all entities without one)"""
+        if type is None:
+            return len(self._names)
+        return self._counts[_TYPE_CODES[type]]
+
+    def counts(self) -> Dict[str, int]:
+        """Per-type entity counts"""
+        return {name: self._counts[code] for code, name in enumerate(ENTITY_TYPES)}
+
+    def file_count(self) -> int:
+        """Number of distinct files that declare at least one entity"""
+        return len(self._paths)
+
+    def _entity(self, index: int) -> Entity:
+        return Entity(
+            self._names[index],
+            ENTITY_TYPES[self._types[index]],
+            self._paths[self._files[index]],
+            self._lines[index],
+            self._docstrings[index]
+        )
+
+    def __iter__(self) -> Iterator[Entity]:
+        for index in range(len(self._names)):
+            yield self._entity(index)
+
+    def iter_type(self, type: str) -> Iterator[Entity]:
+        """Entities of one type, in insertion order"""
+        code = _TYPE_CODES[type]
+        if not self._counts[code]:
+            return
+        types = self._types
+        for index in range(len(types)):
+            if types[index] == code:
+                yield self._entity(index)
+
+    def to_dicts(self) -> List[Dict]:
+        """Entities in the old list-of-dicts shape, for callers that need JSON"""
+        return [entity.to_dict() for entity in self]
+
+
+def build_entity_store(parsed_files: List[Dict]) -> EntityStore:
+    """Collect the entities of every parsed file into one store"""
+    store = EntityStore()
+    for parsed in parsed_files:
+        store.add_parsed(parsed)
+    return store
@@ -0,0 +1,210 @@
+"""
+Background job execution for Codebase Genius
+Runs documentation pipelines off the request thread with bounded concurrency
+"""
+
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+from utils import env_int
+
+
+DEFAULT_JOB_WORKERS = 2
+# Seconds between checks for new events while streaming
+STREAM_POLL_INTERVAL = 0.25
+# Finished jobs kept in memory for status/result lookups
+MAX_FINISHED_JOBS = 200
+
+
+class JobManager:
+    """In-process job registry backed by a bounded thread pool.
+
+    Jobs live in this server process only; a restart forgets them, and the
+    documentation they already wrote to outputs/ is unaffected.
+
+    Jobs never write the Jac graph themselves: graph writes belong to the
+    request that owns the root, not to a worker thread. A completed job's
+    report waits here until a request collects it: claim_recording when its
+    own job is polled, or claim_unrecorded from an explicit record step. It
+    is not pruned before that.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_JOB_WORKERS):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="codegenius-job")
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Dict], **kwargs) -> str:
+        """Queue fn(**kwargs) and return its job id immediately.
+
+        fn must accept a progress keyword: a callback that records the
+        pipeline's stage events on the job.
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": "queued",
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+                "events": [],
+                "recorded": False
+            }
+            self._prune()
+        kwargs["progress"] = lambda event: self._add_event(job_id, event)
+        self._executor.submit(self._run, job_id, fn, kwargs)
+        return job_id
+
+    def _run(self, job_id: str, fn: Callable[..., Dict], kwargs: Dict) -> None:
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            result = fn(**kwargs)
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+            return
+
+        # The pipeline reports its own errors (bad URL, clone failure) as results
+        status = "completed" if result.get("status") == "completed" else "failed"
+        self._update(
+            job_id,
+            status=status,
+            result=result,
+            error=None if status == "completed" else result.get("message"),
+            finished_at=time.time()
+        )
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def _add_event(self, job_id: str, event: Dict) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                event["seq"] = len(job["events"])
+                job["events"].append(event)
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond MAX_FINISHED_JOBS (lock held)"""
+        finished = [
+            j for j in self._jobs.values()
+            if j["finished_at"] is not None and (j["recorded"] or j["status"] != "completed")
+        ]
+        if len(finished) <= MAX_FINISHED_JOBS:
+            return
+        finished.sort(key=lambda j: j["finished_at"])
+        for job in finished[:len(finished) - MAX_FINISHED_JOBS]:
+            del self._jobs[job["job_id"]]
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Job metadata without the result payload, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {
+                "job_id": job_id,
+                "status": job["status"],
+                "submitted_at": job["submitted_at"],
+                "started_at": job["started_at"],
+                "finished_at": job["finished_at"],
+                "error": job["error"]
+            }
+
+    def events(self, job_id: str, since: int = 0) -> Optional[Dict]:
+        """Progress events from index since onwards, with the job's status"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            events = job["events"][since:]
+            return {
+                "job_id": job_id,
+                "status": job["status"],
+                "events": events,
+                "next": since + len(events)
+            }
+
+    def stream_events(self, job_id: str, since: int = 0) -> Iterator[str]:
+        """Yield NDJSON lines as events arrive, ending with a "finished" line"""
+        while True:
+            batch = self.events(job_id, since)
+            if batch is None:
+                yield json.dumps({"event": "error", "message": "Job not found"}) + "\n"
+                return
+
+            for event in batch["events"]:
+                yield json.dumps(event) + "\n"
+            since = batch["next"]
+
+            if batch["status"] not in ("queued", "running"):
+                status = self.status(job_id)
+                yield json.dumps({
+                    "event": "finished",
+                    "status": batch["status"],
+                    "error": status["error"] if status else None
+                }) + "\n"
+                return
+            time.sleep(STREAM_POLL_INTERVAL)
+
+    def result(self, job_id: str) -> Optional[Dict]:
+        """The pipeline report of a finished job, or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job["result"] if job is not None else None
+
+    def claim_recording(self, job_id: str) -> Optional[Dict]:
+        """The report of a completed job not yet recorded in the graph, returned once"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "completed" or job["recorded"]:
+                return None
+            job["recorded"] = True
+            self._prune()
+            return job["result"]
+
+    def claim_unrecorded(self) -> List[Dict]:
+        """Reports of completed jobs not yet recorded in the graph; each is returned once"""
+        with self._lock:
+            claimed = []
+            for job in self._jobs.values():
+                if job["status"] == "completed" and not job["recorded"]:
+                    job["recorded"] = True
+                    claimed.append(job["result"])
+            self._prune()
+            return claimed
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Process-wide JobManager sized by CODEGENIUS_JOB_WORKERS"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            workers = env_int("CODEGENIUS_JOB_WORKERS", DEFAULT_JOB_WORKERS)
+            _manager = JobManager(max(1, workers))
+        return _manager
+
+
+def job_event_stream(job_id: str, since: int = 0):
+    """Chunked NDJSON response that follows a job's progress until it finishes"""
+    # Imported lazily: FastAPI is only available under jac-cloud (jac serve)
+    from fastapi.responses import StreamingResponse
+
+    return StreamingResponse(
+        get_job_manager().stream_events(job_id, since),
+        media_type="application/x-ndjson"
+    )
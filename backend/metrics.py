@@ -0,0 +1,163 @@
+"""
+Pipeline instrumentation for Codebase Genius
+Records wall time, CPU time and peak traced memory per stage, appends each
+run to a local JSONL log and summarizes recent runs as percentiles
+"""
+
+import os
+import json
+import time
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from utils import env_flag
+
+
+DEFAULT_METRICS_LOG = os.path.join("outputs", "metrics.jsonl")
+# Runs summarized by the metrics walker unless it asks for another window
+DEFAULT_WINDOW = 100
+# When the log grows past this size it is trimmed to its newest runs
+METRICS_LOG_MAX_BYTES = 8 * 1024 * 1024
+METRICS_LOG_KEEP_RUNS = 2000
+
+_trace_lock = threading.Lock()
+_trace_users = 0
+_log_lock = threading.Lock()
+
+
+def memory_tracing_enabled() -> bool:
+    """Peak memory is opt-in (CODEGENIUS_TRACE_MEMORY=1): tracemalloc makes parsing ~3x slower"""
+    return env_flag("CODEGENIUS_TRACE_MEMORY")
+
+
+class StageMetrics:
+    """Per-stage wall time, CPU time and tracemalloc peak for one pipeline run.
+
+    CPU time is the calling thread's, so work done in parse worker processes
+    shows up as wall time only. tracemalloc is process-wide: when several
+    jobs run at once their peaks include each other's allocations.
+    """
+
+    def __init__(self, trace_memory: Optional[bool] = None):
+        self.trace_memory = memory_tracing_enabled() if trace_memory is None else trace_memory
+        self.stages: Dict[str, Dict] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """Time the enclosed block and record it under name"""
+        if self.trace_memory:
+            _start_tracing()
+            tracemalloc.reset_peak()
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            record = {
+                "wall": round(time.perf_counter() - wall, 4),
+                "cpu": round(time.thread_time() - cpu, 4)
+            }
+            if self.trace_memory:
+                record["peak_memory"] = tracemalloc.get_traced_memory()[1]
+                _stop_tracing()
+            self.stages[name] = record
+
+    def to_dict(self) -> Dict:
+        return {
+            "stages": dict(self.stages),
+            "total_wall": round(time.perf_counter() - self._started, 4)
+        }
+
+
+def _start_tracing() -> None:
+    global _trace_users
+    with _trace_lock:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _trace_users += 1
+
+
+def _stop_tracing() -> None:
+    global _trace_users
+    with _trace_lock:
+        _trace_users -= 1
+        if _trace_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def metrics_log_path() -> str:
+    return os.getenv("CODEGENIUS_METRICS_LOG", DEFAULT_METRICS_LOG)
+
+
+def append_run_metrics(repository: str, mode: str, metrics: StageMetrics, path: Optional[str] = None) -> None:
+    """Append one completed run to the metrics log"""
+    path = path or metrics_log_path()
+    line = json.dumps({
+        "timestamp": time.time(),
+        "repository": repository,
+        "mode": mode,
+        **metrics.to_dict()
+    }, separators=(',', ':'))
+
+    with _log_lock:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+        if os.path.getsize(path) > METRICS_LOG_MAX_BYTES:
+            _trim_log(path)
+
+
+def _trim_log(path: str) -> None:
+    """Keep only the newest METRICS_LOG_KEEP_RUNS lines (log lock held)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        recent = deque(f, maxlen=METRICS_LOG_KEEP_RUNS)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        f.writelines(recent)
+    os.replace(path + ".tmp", path)
+
+
+def read_recent_runs(window: int = DEFAULT_WINDOW, repository: str = "", path: Optional[str] = None) -> List[Dict]:
+    """The newest window runs from the metrics log, oldest first"""
+    path = path or metrics_log_path()
+    if not os.path.exists(path):
+        return []
+    runs = deque(maxlen=max(1, window))
+    with _log_lock, open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                run = json.loads(line)
+            except ValueError:
+                continue
+            if not repository or run.get("repository") == repository:
+                runs.append(run)
+    return list(runs)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values (which must not be empty)"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize_runs(runs: List[Dict]) -> Dict[str, Dict]:
+    """p50/p95 of wall time, CPU time and peak memory for every stage seen in runs"""
+    samples: Dict[str, Dict[str, List[float]]] = {}
+    for run in runs:
+        for stage, record in run.get("stages", {}).items():
+            stage_samples = samples.setdefault(stage, {})
+            for field, value in record.items():
+                stage_samples.setdefault(field, []).append(value)
+
+    summary = {}
+    for stage, fields in samples.items():
+        entry = {"count": len(fields.get("wall", []))}
+        for field, values in fields.items():
+            entry[field + "_p50"] = percentile(values, 50)
+            entry[field + "_p95"] = percentile(values, 95)
+        summary[stage] = entry
+    return summary
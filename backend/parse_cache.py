@@ -0,0 +1,115 @@
+"""
+Persistent parse cache for Codebase Genius
+Stores parser results on disk keyed by file content, so unchanged files
+are never parsed twice - across re-runs and across repositories
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+from typing import Dict, Optional
+
+from utils import env_int
+
+
+DEFAULT_CACHE_DIR = ".cache"
+DEFAULT_MAX_MB = 256
+
+
+class ParseCache:
+    """Size-bounded LRU cache of parse results backed by SQLite.
+
+    Values are compact JSON compressed with zlib. The file path is not
+    stored, so identical files in different repositories (vendored
+    libraries, forks) share one entry.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._touched = {}
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, file_path: str) -> Optional[Dict]:
+        """Return the cached result for key, re-attached to file_path"""
+        row = self._conn.execute(
+            "SELECT value FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._touched[key] = time.time()
+        result = json.loads(zlib.decompress(row[0]))
+        result["file"] = file_path
+        return result
+
+    def put(self, key: str, result: Dict) -> None:
+        """Store a parse result"""
+        stored = {k: v for k, v in result.items() if k != "file"}
+        value = zlib.compress(json.dumps(stored, separators=(',', ':')).encode('utf-8'))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, value, len(value), time.time())
+        )
+
+    def flush(self) -> None:
+        """Persist access times and pending writes, then enforce the size budget"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE entries SET last_access = ? WHERE key = ?",
+                [(ts, key) for key, ts in self._touched.items()]
+            )
+            self._touched = {}
+        self._evict()
+        self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits its budget"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Evict down to 90% of the budget so the next run does not evict again at once
+        target = int(self.max_bytes * 0.9)
+        doomed = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        ):
+            if total <= target:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def close(self) -> None:
+        """Flush and close the underlying database"""
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+
+def open_parse_cache(cache_dir: Optional[str] = None, max_mb: Optional[int] = None) -> ParseCache:
+    """Open the parse cache configured by CODEGENIUS_CACHE_DIR / CODEGENIUS_PARSE_CACHE_MB"""
+    cache_dir = cache_dir or os.getenv("CODEGENIUS_CACHE_DIR", DEFAULT_CACHE_DIR)
+    if max_mb is None:
+        max_mb = env_int("CODEGENIUS_PARSE_CACHE_MB", DEFAULT_MAX_MB)
+    return ParseCache(os.path.join(cache_dir, "parse_cache.sqlite"), max_mb * 1024 * 1024)
@@ -0,0 +1,569 @@
+"""
+Documentation pipeline for Codebase Genius
+Runs the RepoMapper, CodeAnalyzer and DocGenie stages as plain Python so the
+supervisor walker and background jobs share one implementation
+"""
+
+import os
+import threading
+from concurrent.futures import Executor
+from contextlib import nullcontext
+from itertools import islice
+from typing import Callable, Dict, List, Optional, TextIO
+
+from utils import (
+    validate_repository_url, clone_repository, extract_repo_name, git_blob_shas,
+    get_head_commit, update_repository, diff_changed_files,
+    save_analysis, load_analysis, reanalyze_changed_files,
+    resolve_remote_head, save_result, load_cached_result, result_options_digest,
+    resolve_clone_strategy, clone_strategy_error, resolve_max_parse_bytes,
+    scan_repository, build_file_tree, find_readme, find_entry_points,
+    get_python_files, get_jac_files, triage_files, analyze_files,
+    build_call_graph, generate_class_diagram,
+    get_current_datetime, summarize_text, format_file_size
+)
+from entities import EntityStore, build_entity_store
+from parse_cache import open_parse_cache
+from search_index import open_search_index
+from tree_index import build_tree_index, save_tree_index, eager_tree_enabled
+from code_graph import build_code_graph, save_code_graph, code_graph_size
+from doc_index import DOC_FILENAME, build_doc_index, save_doc_index
+from artifact_store import resolve_codec, compress_stored
+from summarizer import resolve_summary_model, summarize_repository
+from graph_analytics import analyze_call_graph, central_classes, central_nodes, generate_cluster_diagrams
+from storage import get_storage_manager, delete_clones_enabled
+from progress import ProgressTracker
+from metrics import StageMetrics, append_run_metrics
+
+
+AGENTS_USED = ["RepoMapper", "CodeAnalyzer", "DocGenie", "Supervisor"]
+# Skipped files listed in the report and the generated docs
+MAX_REPORTED_SKIPS = 200
+# Module summaries listed in the generated docs
+MAX_MODULE_SUMMARIES = 50
+
+# One lock per repository name: concurrent runs would share temp_repos/<name>
+_repo_locks: Dict[str, threading.Lock] = {}
+_repo_locks_guard = threading.Lock()
+
+
+def _repo_lock(repo_name: str) -> threading.Lock:
+    with _repo_locks_guard:
+        return _repo_locks.setdefault(repo_name, threading.Lock())
+
+
+def run_pipeline(
+    github_url: str,
+    last_commit: str = "",
+    parse_workers: int = 0,
+    use_cache: bool = True,
+    incremental: bool = False,
+    clone_strategy: str = "",
+    use_result_cache: bool = True,
+    progress: Optional[Callable[[Dict], None]] = None,
+    executor: Optional[Executor] = None,
+    clone_slots: Optional[threading.Semaphore] = None
+) -> Dict:
+    """Clone, analyze and document a repository; returns the supervisor report.
+
+    last_commit is the commit recorded on the Repository node by the previous
+    run; with incremental=True only files changed since then are re-parsed.
+    With use_result_cache, a repository whose upstream HEAD matches the last
+    documented commit returns the stored report without cloning.
+    Batch runs pass a shared parse executor and a semaphore that bounds how
+    many clones or fetches run at once.
+    progress, if given, receives a start and end event for every stage.
+    The caller is responsible for recording the result in the graph.
+    """
+    tracker = ProgressTracker(progress)
+
+    # STEP 1: VALIDATE URL AND CLONE STRATEGY
+    with tracker.stage("validate"):
+        if not validate_repository_url(github_url):
+            error = "Invalid GitHub URL"
+        else:
+            error = clone_strategy_error(clone_strategy)
+        if error:
+            tracker.fail(error)
+    if error:
+        return {
+            "status": "error",
+            "message": error
+        }
+
+    repo_name = extract_repo_name(github_url)
+    with _repo_lock(repo_name):
+        return _run_locked(repo_name, github_url, last_commit, parse_workers,
+                           use_cache, incremental, clone_strategy,
+                           use_result_cache, tracker, executor, clone_slots)
+
+
+def _run_locked(
+    repo_name: str,
+    github_url: str,
+    last_commit: str,
+    parse_workers: int,
+    use_cache: bool,
+    incremental: bool,
+    clone_strategy: str,
+    use_result_cache: bool,
+    tracker: ProgressTracker,
+    executor: Optional[Executor],
+    clone_slots: Optional[threading.Semaphore]
+) -> Dict:
+    """Body of run_pipeline, run while holding the repository's lock"""
+    temp_dir = os.path.join("temp_repos", repo_name)
+    output_dir = os.path.join("outputs", repo_name)
+    metrics = StageMetrics()
+
+    # Settings that change what a run produces; a stored result made with
+    # other settings is not reused
+    summary_model = resolve_summary_model()
+    options_digest = result_options_digest({
+        "clone_strategy": resolve_clone_strategy(clone_strategy),
+        "max_parse_bytes": resolve_max_parse_bytes(),
+        "summary_model": summary_model.name if summary_model is not None else "",
+        "eager_tree": eager_tree_enabled()
+    })
+
+    # Result cache: the same URL at an unchanged upstream commit was already
+    # documented (ls-remote costs one round trip, no clone)
+    if use_result_cache:
+        with tracker.stage("lookup"), metrics.measure("lookup"):
+            remote_head = resolve_remote_head(github_url)
+            cached = load_cached_result(output_dir, github_url, remote_head, options_digest) if remote_head else None
+        if cached is not None:
+            get_storage_manager().touch("output", repo_name)
+            cached["cached"] = True
+            cached["lookup_time"] = metrics.stages["lookup"]["wall"]
+            cached["message"] = "Documentation is up to date with commit " + remote_head[:12]
+            return cached
+
+    # STEP 2: REPO MAPPING (RepoMapper Agent)
+
+    with clone_slots or nullcontext(), tracker.stage("clone"), metrics.measure("clone"):
+        # Incremental mode: fetch into the existing clone and diff against
+        # the last documented commit instead of cloning from scratch
+        changes = None
+        previous = None
+        fetched = False
+        if incremental and last_commit:
+            update_result = update_repository(github_url, temp_dir)
+            if update_result["success"]:
+                fetched = True
+                changes = diff_changed_files(temp_dir, last_commit, update_result["commit"])
+                previous = load_analysis(output_dir, temp_dir)
+                # Saved results are only a base for a diff from the same commit
+                if previous is not None and previous["commit"] != last_commit:
+                    previous = None
+        mode = "incremental" if changes is not None and previous is not None else "full"
+        clone_stats = {"strategy": "fetch"}
+
+        # Without a usable diff or analysis the fetched checkout is parsed in
+        # full; it is only cloned again when the fetch itself failed
+        clone_result = None
+        if not fetched:
+            # Clone repository (full, shallow, blobless or sparse)
+            clone_result = clone_repository(github_url, temp_dir, clone_strategy)
+            if clone_result["success"]:
+                clone_stats = {
+                    "strategy": clone_result["strategy"],
+                    "bytes": clone_result["bytes"],
+                    "time": clone_result["time"]
+                }
+            else:
+                tracker.fail(clone_result["message"])
+
+    if clone_result is not None and not clone_result["success"]:
+        return {
+            "status": "error",
+            "agent": "RepoMapper",
+            "message": clone_result["message"]
+        }
+    head_commit = get_head_commit(temp_dir) or ""
+
+    with tracker.stage("map"):
+        # Scan the clone once; every later stage reads from this manifest
+        with metrics.measure("scan"):
+            manifest = scan_repository(temp_dir)
+
+        # Index the file tree for lazy browsing; the nested tree is opt-in
+        with metrics.measure("tree"):
+            save_tree_index(output_dir, build_tree_index(manifest))
+            file_tree = build_file_tree(temp_dir, 5, manifest) if eager_tree_enabled() else None
+
+        # Find and summarize README
+        with metrics.measure("readme"):
+            readme_content = find_readme(temp_dir)
+            readme_summary = ""
+            if readme_content:
+                readme_summary = summarize_text(readme_content, 500)
+
+        # Find source files
+        with metrics.measure("discovery"):
+            entry_points = find_entry_points(temp_dir, manifest)
+            python_files = get_python_files(temp_dir, manifest)
+            jac_files = get_jac_files(temp_dir, manifest)
+        tracker.update(files_scanned=manifest["file_count"])
+
+    with tracker.stage("triage"), metrics.measure("triage"):
+        # Binary, oversized, minified and generated sources (protobuf stubs,
+        # vendored bundles) are listed in the report instead of being parsed
+        triage = triage_files(python_files + jac_files, manifest)
+        parseable = set(triage["parse"])
+        python_to_parse = [f for f in python_files if f in parseable]
+        jac_to_parse = [f for f in jac_files if f in parseable]
+        skipped_files = [
+            dict(skipped, file=os.path.relpath(skipped["file"], temp_dir).replace(os.sep, '/'))
+            for skipped in triage["skipped"]
+        ]
+
+    # STEP 3: CODE ANALYSIS (CodeAnalyzer Agent)
+    with tracker.stage("parse"), metrics.measure("parse"):
+        # Parse every Python and Jac file (in worker processes for large repos);
+        # files whose content is already in the parse cache are not parsed again
+        parse_cache = None
+        content_hashes = {}
+        if use_cache:
+            parse_cache = open_parse_cache()
+            content_hashes = git_blob_shas(temp_dir)
+        try:
+            if mode == "incremental":
+                # Only files touched since the last documented commit are re-parsed
+                analysis = reanalyze_changed_files(
+                    python_to_parse, jac_to_parse,
+                    previous["parsed_files"], changes["changed"],
+                    workers=parse_workers,
+                    executor=executor,
+                    cache=parse_cache,
+                    content_hashes=content_hashes,
+                    on_parsed=lambda count: tracker.advance(files_parsed=count)
+                )
+            else:
+                analysis = analyze_files(
+                    python_to_parse, jac_to_parse,
+                    workers=parse_workers,
+                    executor=executor,
+                    cache=parse_cache,
+                    content_hashes=content_hashes,
+                    on_parsed=lambda count: tracker.advance(files_parsed=count)
+                )
+        finally:
+            if parse_cache is not None:
+                parse_cache.close()
+        parsed_files = analysis["parsed_files"]
+        # Functions and classes go into a columnar store with running counts
+        entities = build_entity_store(parsed_files)
+        tracker.update(files_parsed=analysis["files_parsed"], entities_found=len(entities))
+
+    with tracker.stage("graph"):
+        # Build Code Context Graph (CCG)
+        with metrics.measure("call_graph"):
+            python_parsed = [p for p in parsed_files if "functions" in p]
+            call_graph = {}
+            if python_parsed:
+                call_graph = build_call_graph(python_parsed)
+        tracker.update(call_graph_nodes=len(call_graph))
+
+        # Files, modules, classes and functions with their relationships,
+        # stored for the graph nodes and traversal walkers in main.jac
+        with metrics.measure("code_graph"):
+            code_graph = build_code_graph(parsed_files, temp_dir, head_commit)
+            code_graph_counts = code_graph_size(code_graph)
+
+        # Rank (PageRank) and cluster (label propagation) functions and classes
+        with metrics.measure("graph_analytics"):
+            graph_analysis = analyze_call_graph(call_graph, python_parsed) if call_graph else None
+
+        with metrics.measure("diagrams"):
+            class_diagram = ""
+            if parsed_files:
+                central = central_classes(graph_analysis) if graph_analysis else None
+                class_diagram = generate_class_diagram(parsed_files, central)
+            cluster_diagrams = generate_cluster_diagrams(graph_analysis) if graph_analysis else []
+
+    # LLM summaries of the README, modules and classes, batched and cached;
+    # off unless CODEGENIUS_SUMMARY_MODEL names a model
+    summaries = None
+    if summary_model is not None:
+        with tracker.stage("summarize"), metrics.measure("summarize"):
+            summaries = summarize_repository(readme_content, parsed_files, temp_dir, summary_model, use_cache)
+            if summaries["readme"]:
+                readme_summary = summaries["readme"]
+            tracker.update(summaries_generated=summaries["stats"]["generated"])
+
+    # STEP 4: DOCUMENTATION GENERATION (DocGenie Agent)
+    # Sections are streamed to disk as they are rendered; the finished file
+    # replaces the previous docs.md in one step so readers never see half a doc
+    with tracker.stage("render"), metrics.measure("render"):
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, DOC_FILENAME)
+        partial_path = output_path + ".partial"
+
+        with open(partial_path, 'w', encoding='utf-8') as f:
+            documentation_size = write_documentation(
+                f, repo_name, github_url, readme_summary,
+                python_files, jac_files, entry_points,
+                parsed_files, entities, call_graph,
+                class_diagram, cluster_diagrams, skipped_files,
+                summaries
+            )
+        os.replace(partial_path, output_path)
+        documentation_bytes = os.path.getsize(output_path)
+
+    # STEP 5: SAVE DOCUMENTATION
+    with tracker.stage("save"), metrics.measure("save"):
+        # gzip or zstd per CODEGENIUS_COMPRESSION; readers find whichever variant is stored
+        compression = resolve_codec()
+        stored_doc = compress_stored(output_path, compression)
+        documentation_stored_size = os.path.getsize(stored_doc)
+        # Heading offsets and sizes, so clients can read the doc one section at a time
+        doc_index = build_doc_index(output_path)
+        save_doc_index(output_dir, doc_index)
+        # Keep parse results so the next incremental run can reuse them
+        save_analysis(output_dir, temp_dir, head_commit, parsed_files)
+        save_code_graph(output_dir, code_graph)
+
+    with tracker.stage("index"), metrics.measure("index"):
+        # Make the repository's symbols searchable; only files whose entities
+        # changed since the last run are rewritten
+        search_index = open_search_index()
+        try:
+            index_stats = search_index.index_repository(repo_name, temp_dir, entities)
+        finally:
+            search_index.close()
+
+    with tracker.stage("storage"), metrics.measure("storage"):
+        # Keep only the outputs if configured, then evict the least recently
+        # used clones of other repositories that are over the disk budget
+        storage = get_storage_manager()
+        clone_deleted = delete_clones_enabled() and repo_name not in storage.pinned()
+        if clone_deleted:
+            storage.delete_clone(repo_name)
+            clone_bytes = 0
+        else:
+            # A fresh clone was measured by clone_repository; a fetched one is walked
+            clone_bytes = storage.record("clone", repo_name, size=clone_stats.get("bytes"))
+        evicted = storage.enforce_budget(exclude=repo_name, lock_for=_repo_lock)
+
+    append_run_metrics(repo_name, mode, metrics)
+
+    # FINAL REPORT
+    report = {
+        "status": "completed",
+        "repository": repo_name,
+        "url": github_url,
+        "local_path": temp_dir,
+        "documentation_path": output_path,
+        "mode": mode,
+        "commit": head_commit,
+        "documented_at": get_current_datetime(),
+        "clone": clone_stats,
+        "agents_used": AGENTS_USED,
+        "statistics": {
+            "files_analyzed": len(parsed_files),
+            "functions_found": entities.count("function"),
+            "classes_found": entities.count("class"),
+            "call_graph_nodes": len(call_graph),
+            "call_graph_edges": graph_analysis["graph"].edge_count if graph_analysis else 0,
+            "call_graph_clusters": sum(1 for c in graph_analysis["clusters"] if len(c) > 1) if graph_analysis else 0,
+            "code_graph_nodes": code_graph_counts["nodes"],
+            "code_graph_edges": code_graph_counts["edges"],
+            "summaries": summaries["stats"] if summaries else None,
+            # Characters, as before the doc was streamed; the byte sizes follow
+            "documentation_size": documentation_size,
+            "documentation_bytes": documentation_bytes,
+            "documentation_stored_size": documentation_stored_size,
+            "compression": compression,
+            "documentation_sections": len(doc_index["offsets"]),
+            "files_scanned": manifest["file_count"],
+            "scan_time": manifest["scan_time"],
+            "parse_mode": analysis["mode"],
+            "parse_workers": analysis["workers"],
+            "parse_time": analysis["parse_time"],
+            "files_parsed": analysis["files_parsed"],
+            "parse_cache_hits": analysis["cache_hits"],
+            "parse_cache_misses": analysis["cache_misses"],
+            "files_reused": analysis.get("files_reused", 0),
+            # A diff without a usable previous analysis falls back to a full run
+            "files_changed": len(changes["changed"]) + len(changes["deleted"]) if mode == "incremental" else 0,
+            "symbols_indexed": index_stats["symbols_indexed"],
+            "index_files_updated": index_stats["files_indexed"] + index_stats["files_removed"],
+            "files_skipped": len(skipped_files)
+        },
+        "storage": {
+            "clone_bytes": clone_bytes,
+            "clone_deleted": clone_deleted,
+            "clones_evicted": evicted
+        },
+        "central_entities": central_nodes(graph_analysis) if graph_analysis else [],
+        "skipped_files": skipped_files[:MAX_REPORTED_SKIPS],
+        "metrics": metrics.to_dict(),
+        "cached": False,
+        "message": "Multi-agent documentation generation completed successfully"
+    }
+    if file_tree is not None:
+        report["file_tree"] = file_tree
+    save_result(output_dir, report, options_digest)
+    storage.record("output", repo_name)
+    return report
+
+
+def write_documentation(
+    out: TextIO,
+    repo_name: str,
+    github_url: str,
+    readme_summary: str,
+    python_files: List[str],
+    jac_files: List[str],
+    entry_points: List[str],
+    parsed_files: List[Dict],
+    entities: EntityStore,
+    call_graph: Dict,
+    class_diagram: str,
+    cluster_diagrams: List[Dict],
+    skipped_files: List[Dict],
+    summaries: Optional[Dict] = None
+) -> int:
+    """Write the Markdown documentation to out as it is produced (DocGenie Agent).
+
+    Returns the number of characters written.
+    """
+    written = 0
+
+    def write(text: str) -> None:
+        nonlocal written
+        written += len(text)
+        out.write(text)
+
+    # Title and metadata
+    write("# " + repo_name + " - Documentation\n\n")
+    write("*Generated by Codebase Genius - Multi-Agent System*\n\n")
+    write("**Repository:** " + github_url + "\n")
+    write("**Generated:** " + get_current_datetime() + "\n")
+    write("**Agents Used:** RepoMapper, CodeAnalyzer, DocGenie, Supervisor\n\n")
+    write("---\n\n")
+
+    # Table of Contents
+    write("## 📋 Table of Contents\n\n")
+    write("1. [Overview](#overview)\n")
+    write("2. [Project Structure](#project-structure)\n")
+    write("3. [Installation](#installation)\n")
+    write("4. [Code Analysis](#code-analysis)\n")
+    write("5. [API Reference](#api-reference)\n")
+    write("6. [Architecture Diagrams](#architecture-diagrams)\n\n")
+    write("---\n\n")
+
+    # Overview
+    write("## 📖 Overview\n\n")
+    if readme_summary:
+        write(readme_summary + "\n\n")
+    else:
+        write("**" + repo_name + "** is a software project containing:\n\n")
+        write("- " + str(len(python_files)) + " Python files\n")
+        write("- " + str(len(jac_files)) + " Jac files\n")
+        write("- " + str(len(entry_points)) + " entry points\n\n")
+
+    # Project Structure
+    write("## 📁 Project Structure\n\n")
+    write("```\n")
+    write(repo_name + "/\n")
+    if entry_points:
+        write("├── Entry Points:\n")
+        for ep in entry_points[:5]:
+            filename = os.path.basename(ep)
+            write("│   ├── " + filename + "\n")
+    write("├── Python files: " + str(len(python_files)) + "\n")
+    write("├── Jac files: " + str(len(jac_files)) + "\n")
+    write("```\n\n")
+
+    # Installation
+    write("## 🚀 Installation\n\n")
+    write("### Clone Repository\n\n")
+    write("```bash\n")
+    write("git clone " + github_url + "\n")
+    write("cd " + repo_name + "\n")
+    write("```\n\n")
+    write("### Install Dependencies\n\n")
+    write("```bash\n")
+    write("pip install -r requirements.txt\n")
+    write("```\n\n")
+
+    # Code Analysis
+    write("## 🔍 Code Analysis\n\n")
+    write("### Statistics\n\n")
+    write("- **Files Analyzed:** " + str(len(parsed_files)) + "\n")
+    write("- **Functions Found:** " + str(entities.count("function")) + "\n")
+    write("- **Classes Found:** " + str(entities.count("class")) + "\n")
+    write("- **Call Graph Size:** " + str(len(call_graph)) + " nodes\n")
+    write("- **Files Skipped:** " + str(len(skipped_files)) + "\n\n")
+
+    if skipped_files:
+        # Skipped files are only listed, with the reason they were not parsed
+        write("### Skipped Files\n\n")
+        for skipped in skipped_files[:MAX_REPORTED_SKIPS]:
+            write("- `" + skipped["file"] + "` - " + skipped["reason"])
+            write(" (" + format_file_size(skipped["size"]) + ")\n")
+        if len(skipped_files) > MAX_REPORTED_SKIPS:
+            write("- ... and " + str(len(skipped_files) - MAX_REPORTED_SKIPS) + " more\n")
+        write("\n")
+
+    # API Reference
+    write("## 📚 API Reference\n\n")
+
+    module_summaries = [(path, text) for path, text in (summaries or {}).get("modules", {}).items() if text]
+    if module_summaries:
+        write("### Modules\n\n")
+        for path, text in module_summaries[:MAX_MODULE_SUMMARIES]:
+            write("- `" + path + "` - " + " ".join(text.split()) + "\n")
+        if len(module_summaries) > MAX_MODULE_SUMMARIES:
+            write("- ... and " + str(len(module_summaries) - MAX_MODULE_SUMMARIES) + " more\n")
+        write("\n")
+    class_summaries = (summaries or {}).get("classes", {})
+
+    if entities.count("function"):
+        write("### Functions\n\n")
+        for func in islice(entities.iter_type("function"), 15):
+            write("#### `" + func.name + "()`\n\n")
+            if func.docstring:
+                write(func.docstring + "\n\n")
+            write("**File:** `" + os.path.basename(func.file_path) + "` ")
+            write("(Line " + str(func.line_start) + ")\n\n")
+
+    if entities.count("class"):
+        write("### Classes\n\n")
+        for cls in islice(entities.iter_type("class"), 15):
+            write("#### `" + cls.name + "`\n\n")
+            summary = class_summaries.get(cls.file_path + ":" + cls.name)
+            if summary:
+                write("*" + " ".join(summary.split()) + "*\n\n")
+            if cls.docstring:
+                write(cls.docstring + "\n\n")
+            write("**File:** `" + os.path.basename(cls.file_path) + "` ")
+            write("(Line " + str(cls.line_start) + ")\n\n")
+
+    # Architecture Diagrams
+    write("## 🎨 Architecture Diagrams\n\n")
+
+    if parsed_files:
+        write("### Class Diagram\n\n")
+        write(class_diagram + "\n\n")
+
+    if cluster_diagrams:
+        write("### Call Graph Clusters\n\n")
+        write("Functions and classes grouped by how they call each other, ")
+        write("showing the most central (PageRank) members of each cluster.\n\n")
+        for number, cluster in enumerate(cluster_diagrams, 1):
+            write("#### Cluster " + str(number) + " (" + str(cluster["size"]) + " members)\n\n")
+            write("**Central:** " + ", ".join("`" + name + "`" for name in cluster["central"]) + "\n\n")
+            write(cluster["diagram"] + "\n\n")
+
+    # Footer
+    write("---\n\n")
+    write("*Generated by Codebase Genius Multi-Agent System*\n\n")
+    write("**Agents:**\n")
+    write("- **RepoMapper:** Repository cloning and mapping\n")
+    write("- **CodeAnalyzer:** Code parsing and CCG construction\n")
+    write("- **DocGenie:** Documentation generation\n")
+    write("- **Supervisor:** Workflow orchestration\n")
+    return written
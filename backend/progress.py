@@ -0,0 +1,89 @@
+"""
+Pipeline progress events for Codebase Genius
+Emits stage start/end events with running counters to an optional callback
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+
+# Seconds between progress events while a stage is running
+PROGRESS_INTERVAL = 0.5
+
+
+class ProgressTracker:
+    """Tracks the current pipeline stage and reports it to a callback.
+
+    Stages: validate, lookup, clone, map, triage, parse, graph, render, save and index.
+
+    Each event is a plain dict:
+        {"stage": "parse", "event": "start" | "progress" | "end" | "error",
+         "timestamp": ..., "elapsed": ... (end/error only),
+         "counters": {"files_scanned": ..., "files_parsed": ..., ...}}
+
+    "progress" events carry counters that change while a stage runs; a
+    stage that fails without raising (fail()) ends with "error".
+    """
+
+    def __init__(self, callback: Optional[Callable[[Dict], None]] = None):
+        self.callback = callback
+        self.counters: Dict[str, int] = {
+            "files_scanned": 0,
+            "files_parsed": 0,
+            "entities_found": 0,
+            "call_graph_nodes": 0
+        }
+        self.current: Optional[str] = None
+        self._failure: Optional[str] = None
+        self._reported = 0.0
+
+    def update(self, **counters: int) -> None:
+        """Set counter values; they are attached to the next event"""
+        self.counters.update(counters)
+
+    def advance(self, **counters: int) -> None:
+        """Set counter values and report them, at most every PROGRESS_INTERVAL seconds"""
+        self.counters.update(counters)
+        if self.current is not None and time.time() - self._reported >= PROGRESS_INTERVAL:
+            self._reported = time.time()
+            self.emit(self.current, "progress")
+
+    def fail(self, message: str) -> None:
+        """Mark the current stage as failed; it ends with an error event instead of end"""
+        self._failure = message
+
+    def emit(self, stage: str, event: str, **fields) -> None:
+        """Send one event to the callback (a no-op without one)"""
+        if self.callback is None:
+            return
+        payload = {
+            "stage": stage,
+            "event": event,
+            "timestamp": time.time(),
+            "counters": dict(self.counters)
+        }
+        payload.update(fields)
+        try:
+            self.callback(payload)
+        except Exception:
+            # A broken listener must never fail the pipeline
+            pass
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator["ProgressTracker"]:
+        """Wrap a pipeline stage with start and end (or error) events"""
+        started = time.perf_counter()
+        self.current, self._failure, self._reported = name, None, time.time()
+        self.emit(name, "start")
+        try:
+            yield self
+        except Exception as e:
+            self.emit(name, "error", elapsed=round(time.perf_counter() - started, 4), message=str(e))
+            raise
+        finally:
+            self.current = None
+        if self._failure is not None:
+            self.emit(name, "error", elapsed=round(time.perf_counter() - started, 4), message=self._failure)
+        else:
+            self.emit(name, "end", elapsed=round(time.perf_counter() - started, 4))
@@ -0,0 +1,203 @@
+"""
+Symbol search index for Codebase Genius
+Full-text index (SQLite FTS5) over the functions and classes of every
+documented repository, updated file by file when a repository is re-documented
+"""
+
+import os
+import re
+import time
+import hashlib
+import sqlite3
+from typing import Dict, List, Optional
+
+from entities import EntityStore
+from parse_cache import DEFAULT_CACHE_DIR
+
+
+# bm25 column weights: name, terms, qualified, docstring
+_RANK_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+_CAMEL_BOUNDARY = re.compile(r'(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+_QUERY_TOKEN = re.compile(r'\w+')
+
+
+def split_identifier(name: str) -> str:
+    """Split snake_case and CamelCase names into lowercase words"""
+    words = []
+    for part in name.split('_'):
+        words.extend(_CAMEL_BOUNDARY.split(part))
+    return " ".join(w.lower() for w in words if w)
+
+
+def qualified_name(relative_path: str, name: str) -> str:
+    """Dotted module path plus the entity name, e.g. pkg.module.func"""
+    module = os.path.splitext(relative_path)[0].replace('/', '.')
+    if module.endswith(".__init__"):
+        module = module[:-len(".__init__")]
+    return module + "." + name if module else name
+
+
+class SearchIndex:
+    """Persistent inverted index of entity names, qualified paths and docstrings.
+
+    Rows are grouped by (repository, file). Each file keeps a digest of its
+    entities, so re-indexing a repository rewrites only the files whose
+    entities changed and drops the files that no longer exist.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS symbols USING fts5("
+            " name, terms, qualified, docstring,"
+            " repo UNINDEXED, type UNINDEXED, file UNINDEXED, line UNINDEXED)"
+        )
+        # FTS5 cannot index its UNINDEXED columns, so row ownership lives here
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS symbol_rows ("
+            " id INTEGER PRIMARY KEY,"
+            " repo TEXT NOT NULL,"
+            " file TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS symbol_rows_file ON symbol_rows (repo, file)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS indexed_files ("
+            " repo TEXT NOT NULL,"
+            " file TEXT NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " PRIMARY KEY (repo, file))"
+        )
+        self._conn.commit()
+
+    def index_repository(self, repo: str, repo_root: str, entities: EntityStore) -> Dict:
+        """Bring the index for repo in line with entities; returns update counts"""
+        by_file: Dict[str, List] = {}
+        for entity in entities:
+            relative = os.path.relpath(entity.file_path, repo_root).replace(os.sep, '/')
+            by_file.setdefault(relative, []).append(entity)
+
+        known = dict(self._conn.execute(
+            "SELECT file, digest FROM indexed_files WHERE repo = ?", (repo,)
+        ).fetchall())
+
+        changed = 0
+        symbols = 0
+        with self._conn:
+            for relative, file_entities in by_file.items():
+                digest = _entities_digest(file_entities)
+                if known.pop(relative, None) == digest:
+                    continue
+                self._drop_file(repo, relative)
+                for entity in file_entities:
+                    cursor = self._conn.execute(
+                        "INSERT INTO symbols (name, terms, qualified, docstring, repo, type, file, line)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (entity.name, split_identifier(entity.name),
+                         qualified_name(relative, entity.name), entity.docstring or "",
+                         repo, entity.type, relative, entity.line_start)
+                    )
+                    self._conn.execute(
+                        "INSERT INTO symbol_rows (id, repo, file) VALUES (?, ?, ?)",
+                        (cursor.lastrowid, repo, relative)
+                    )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO indexed_files (repo, file, digest) VALUES (?, ?, ?)",
+                    (repo, relative, digest)
+                )
+                changed += 1
+                symbols += len(file_entities)
+
+            # Whatever is left in known no longer declares any entity
+            for relative in known:
+                self._drop_file(repo, relative)
+
+        return {
+            "files_indexed": changed,
+            "files_unchanged": len(by_file) - changed,
+            "files_removed": len(known),
+            "symbols_indexed": symbols
+        }
+
+    def _drop_file(self, repo: str, relative: str) -> None:
+        ids = self._conn.execute(
+            "SELECT id FROM symbol_rows WHERE repo = ? AND file = ?", (repo, relative)
+        ).fetchall()
+        self._conn.executemany("DELETE FROM symbols WHERE rowid = ?", ids)
+        self._conn.execute("DELETE FROM symbol_rows WHERE repo = ? AND file = ?", (repo, relative))
+        self._conn.execute("DELETE FROM indexed_files WHERE repo = ? AND file = ?", (repo, relative))
+
+    def search(self, query: str, repo: str = "", entity_type: str = "", limit: int = 20) -> List[Dict]:
+        """Ranked hits for query; every word must match a prefix of some field"""
+        tokens = _QUERY_TOKEN.findall(query)
+        if not tokens:
+            return []
+        # Quote each word so user input can never be read as FTS5 syntax
+        match = " ".join('"' + token + '"*' for token in tokens)
+
+        sql = (
+            "SELECT repo, name, type, file, line, qualified, docstring,"
+            " bm25(symbols, ?, ?, ?, ?) AS score"
+            " FROM symbols WHERE symbols MATCH ?"
+        )
+        params: List = list(_RANK_WEIGHTS) + [match]
+        if repo:
+            sql += " AND repo = ?"
+            params.append(repo)
+        if entity_type:
+            sql += " AND type = ?"
+            params.append(entity_type)
+        # Exact name matches first, then bm25 (lower is better)
+        sql += " ORDER BY name = ? COLLATE NOCASE DESC, score LIMIT ?"
+        params += [query.strip(), max(1, limit)]
+
+        return [
+            {
+                "repository": row[0],
+                "name": row[1],
+                "type": row[2],
+                "file": row[3],
+                "line": row[4],
+                "qualified_name": row[5],
+                "docstring": (row[6] or "").split("\n", 1)[0],
+                "score": round(-row[7], 4)
+            }
+            for row in self._conn.execute(sql, params)
+        ]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _entities_digest(file_entities: List) -> str:
+    digest = hashlib.sha1()
+    for entity in file_entities:
+        digest.update(f"{entity.type}\0{entity.name}\0{entity.line_start}\0{entity.docstring or ''}\0".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def open_search_index(cache_dir: Optional[str] = None) -> SearchIndex:
+    """Open the search index stored next to the parse cache (CODEGENIUS_CACHE_DIR)"""
+    cache_dir = cache_dir or os.getenv("CODEGENIUS_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return SearchIndex(os.path.join(cache_dir, "search_index.sqlite"))
+
+
+def search_symbols(query: str, repo: str = "", entity_type: str = "", limit: int = 20) -> Dict:
+    """Run one search against the shared index; returns hits and timing"""
+    started = time.perf_counter()
+    index = open_search_index()
+    try:
+        hits = index.search(query, repo, entity_type, limit)
+    finally:
+        index.close()
+    return {
+        "query": query,
+        "results": hits,
+        "count": len(hits),
+        "search_time": round(time.perf_counter() - started, 4)
+    }
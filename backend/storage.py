@@ -0,0 +1,261 @@
+"""
+Storage manager for Codebase Genius
+Tracks the size and last access time of every clone (temp_repos/<name>) and
+output directory (outputs/<name>), evicts least recently used clones to stay
+under a byte budget and never touches pinned repositories
+"""
+
+import os
+import time
+import shutil
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional
+
+from utils import directory_size, env_flag, env_int
+from parse_cache import DEFAULT_CACHE_DIR
+
+
+CLONES_DIR = "temp_repos"
+OUTPUTS_DIR = "outputs"
+DEFAULT_CLONE_BUDGET_MB = 2048
+# Output reads are recorded in memory and written at most this often
+TOUCH_FLUSH_SECONDS = 30
+KINDS = ("clone", "output")
+
+
+def delete_clones_enabled() -> bool:
+    """Delete each clone once its analysis is saved (CODEGENIUS_DELETE_CLONES=1)"""
+    return env_flag("CODEGENIUS_DELETE_CLONES")
+
+
+class StorageManager:
+    """Registry of clones and outputs with LRU eviction of clones.
+
+    Sizes are measured when a run finishes (or on refresh), not on every
+    read. Eviction goes oldest access first, skips pinned repositories and
+    stops at 90% of the budget so the next run does not evict again at once.
+    """
+
+    def __init__(self, path: str, clone_budget: int, pinned: Optional[List[str]] = None,
+                 clones_dir: str = CLONES_DIR, outputs_dir: str = OUTPUTS_DIR):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.clone_budget = clone_budget
+        self.directories = {"clone": clones_dir, "output": outputs_dir}
+        self._configured_pins = set(pinned or [])
+        self._touched: Dict[tuple, float] = {}
+        self._flushed = time.time()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " kind TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " PRIMARY KEY (kind, name))"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS pins (name TEXT PRIMARY KEY)")
+        self._conn.commit()
+        self.sync()
+
+    def path(self, kind: str, name: str) -> str:
+        return os.path.join(self.directories[kind], name)
+
+    # ---- tracking ----
+
+    def sync(self) -> None:
+        """Register directories created outside the manager and forget removed ones"""
+        with self._lock:
+            known = {(kind, name) for kind, name in self._conn.execute("SELECT kind, name FROM entries")}
+            present = set()
+            for kind, directory in self.directories.items():
+                try:
+                    with os.scandir(directory) as it:
+                        present.update((kind, item.name) for item in it if item.is_dir(follow_symlinks=False))
+                except OSError:
+                    continue
+            for kind, name in present - known:
+                path = self.path(kind, name)
+                try:
+                    last_access = os.stat(path).st_mtime
+                except OSError:
+                    continue
+                self._conn.execute(
+                    "INSERT INTO entries (kind, name, size, last_access) VALUES (?, ?, ?, ?)",
+                    (kind, name, directory_size(path), last_access)
+                )
+            self._conn.executemany(
+                "DELETE FROM entries WHERE kind = ? AND name = ?", list(known - present)
+            )
+            self._conn.commit()
+
+    def record(self, kind: str, name: str, size: Optional[int] = None) -> int:
+        """Record a clone or output after it was written and mark it used now.
+
+        size is the byte count when the caller already measured it (a fresh
+        clone); otherwise the directory is walked.
+        """
+        path = self.path(kind, name)
+        with self._lock:
+            if not os.path.isdir(path):
+                self._conn.execute("DELETE FROM entries WHERE kind = ? AND name = ?", (kind, name))
+                self._conn.commit()
+                return 0
+            if size is None:
+                size = directory_size(path)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (kind, name, size, last_access) VALUES (?, ?, ?, ?)",
+                (kind, name, size, time.time())
+            )
+            self._touched.pop((kind, name), None)
+            self._conn.commit()
+        return size
+
+    def touch(self, kind: str, name: str) -> None:
+        """Mark a clone or output as used; written out in batches"""
+        with self._lock:
+            self._touched[(kind, name)] = time.time()
+            if time.time() - self._flushed >= TOUCH_FLUSH_SECONDS:
+                self._flush()
+
+    def _flush(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE entries SET last_access = ? WHERE kind = ? AND name = ?",
+                [(ts, kind, name) for (kind, name), ts in self._touched.items()]
+            )
+            self._touched = {}
+            self._conn.commit()
+        self._flushed = time.time()
+
+    # ---- pinning ----
+
+    def pinned(self) -> List[str]:
+        with self._lock:
+            stored = {name for (name,) in self._conn.execute("SELECT name FROM pins")}
+        return sorted(stored | self._configured_pins)
+
+    def pin(self, name: str, pinned: bool = True) -> None:
+        """Pin or unpin a repository; pinned clones are never evicted or deleted"""
+        with self._lock:
+            if pinned:
+                self._conn.execute("INSERT OR IGNORE INTO pins (name) VALUES (?)", (name,))
+            else:
+                self._conn.execute("DELETE FROM pins WHERE name = ?", (name,))
+            self._conn.commit()
+
+    # ---- eviction ----
+
+    def delete_clone(self, name: str) -> int:
+        """Remove a clone unless it is pinned; returns the bytes freed"""
+        if name in self.pinned():
+            return 0
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size FROM entries WHERE kind = 'clone' AND name = ?", (name,)
+            ).fetchone()
+            shutil.rmtree(self.path("clone", name), ignore_errors=True)
+            self._conn.execute("DELETE FROM entries WHERE kind = 'clone' AND name = ?", (name,))
+            self._touched.pop(("clone", name), None)
+            self._conn.commit()
+        return row[0] if row else 0
+
+    def enforce_budget(self, exclude: str = "",
+                       lock_for: Optional[Callable[[str], threading.Lock]] = None) -> List[str]:
+        """Evict least recently used clones until they fit the budget.
+
+        exclude is a clone still in use. With lock_for, a clone is only
+        evicted while its repository's lock can be taken without waiting,
+        so a run in progress never loses its clone. Returns the evicted names.
+        """
+        if self.clone_budget <= 0:
+            return []
+        pinned = set(self.pinned())
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(
+                "SELECT name, size FROM entries WHERE kind = 'clone' ORDER BY last_access ASC"
+            ).fetchall()
+        total = sum(size for _, size in rows)
+        if total <= self.clone_budget:
+            return []
+
+        target = int(self.clone_budget * 0.9)
+        evicted = []
+        for name, size in rows:
+            if total <= target:
+                break
+            if name == exclude or name in pinned:
+                continue
+            lock = lock_for(name) if lock_for else None
+            if lock is not None and not lock.acquire(blocking=False):
+                continue
+            try:
+                total -= self.delete_clone(name)
+            finally:
+                if lock is not None:
+                    lock.release()
+            evicted.append(name)
+        return evicted
+
+    # ---- reporting ----
+
+    def usage(self, refresh: bool = False) -> Dict:
+        """Per-repository clone and output sizes and access times, with totals"""
+        if refresh:
+            # Measure every directory again, e.g. after files were added by hand
+            self.sync()
+            with self._lock:
+                rows = self._conn.execute("SELECT kind, name FROM entries").fetchall()
+            sizes = [(directory_size(self.path(kind, name)), kind, name) for kind, name in rows]
+            with self._lock:
+                self._conn.executemany("UPDATE entries SET size = ? WHERE kind = ? AND name = ?", sizes)
+                self._conn.commit()
+        pinned = set(self.pinned())
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(
+                "SELECT kind, name, size, last_access FROM entries ORDER BY name"
+            ).fetchall()
+
+        repositories: Dict[str, Dict] = {}
+        totals = {kind: 0 for kind in KINDS}
+        for kind, name, size, last_access in rows:
+            entry = repositories.setdefault(name, {
+                "name": name,
+                "pinned": name in pinned,
+                "clone_size": 0,
+                "clone_last_access": None,
+                "output_size": 0,
+                "output_last_access": None
+            })
+            entry[kind + "_size"] = size
+            entry[kind + "_last_access"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last_access))
+            totals[kind] += size
+        return {
+            "clone_budget": self.clone_budget,
+            "clone_bytes": totals["clone"],
+            "output_bytes": totals["output"],
+            "clones": sum(1 for kind, *_ in rows if kind == "clone"),
+            "outputs": sum(1 for kind, *_ in rows if kind == "output"),
+            "pinned": sorted(pinned),
+            "delete_clones": delete_clones_enabled(),
+            "repositories": list(repositories.values())
+        }
+
+
+_manager: Optional[StorageManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_storage_manager() -> StorageManager:
+    """Process-wide StorageManager configured by CODEGENIUS_CLONE_BUDGET_MB / CODEGENIUS_PINNED_REPOS"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            cache_dir = os.getenv("CODEGENIUS_CACHE_DIR", DEFAULT_CACHE_DIR)
+            budget_mb = env_int("CODEGENIUS_CLONE_BUDGET_MB", DEFAULT_CLONE_BUDGET_MB)
+            pinned = [name.strip() for name in os.getenv("CODEGENIUS_PINNED_REPOS", "").split(",") if name.strip()]
+            _manager = StorageManager(os.path.join(cache_dir, "storage.sqlite"), budget_mb * 1024 * 1024, pinned)
+        return _manager
@@ -0,0 +1,420 @@
+"""
+LLM summaries for Codebase Genius
+Summarizes the README, every module and every class with a language model,
+many entities per prompt, with responses cached by content and prompt, a
+limit on concurrent requests and a per-run token budget; whatever the
+budget does not cover falls back to summarize_text
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from utils import summarize_text, env_int
+from parse_cache import DEFAULT_CACHE_DIR
+
+
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TOKEN_BUDGET = 200000
+# Output tokens allowed per entity when reserving budget for a batch
+OUTPUT_TOKENS_PER_ENTITY = 80
+# Entity text sent to the model is cut to this many characters
+MAX_ENTITY_CHARS = 1500
+MAX_README_CHARS = 6000
+FALLBACK_LENGTH = 300
+README_FALLBACK_LENGTH = 500
+
+SUMMARY_INSTRUCTIONS = (
+    "You write reference documentation. Summarize each code entity below in "
+    "one or two plain sentences: what it is for, not how it is written. "
+    "Summarize the README entity in one short paragraph. Answer with only a "
+    "JSON object mapping each entity id to its summary."
+)
+_ENTITY_HEADER = re.compile(r'^### id: (\S+) \((\w+) ([^)]*)\)$', re.MULTILINE)
+_SIGNATURE_LINE = re.compile(r'\s*(?:def|class|node|walker|edge|obj|can)\s+\w')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (four characters per token), used for the budget"""
+    return len(text) // 4 + 1
+
+
+# ============================================
+# MODELS
+# ============================================
+
+class LocalSummaryModel:
+    """Deterministic offline stand-in for a language model.
+
+    Answers a summary prompt with the first sentence of each entity's
+    description (or the names it defines), in the same JSON format a
+    real model is asked for, so the whole stage can be tested and
+    benchmarked without network access. latency simulates the round
+    trip of one request.
+    """
+
+    name = "local"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def complete(self, prompt: str, max_tokens: int) -> Tuple[str, int]:
+        if self.latency:
+            time.sleep(self.latency)
+        headers = list(_ENTITY_HEADER.finditer(prompt))
+        answers = {}
+        for i, header in enumerate(headers):
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(prompt)
+            lines = prompt[header.end():end].strip().splitlines()
+            prose = " ".join(" ".join(line for line in lines if not _SIGNATURE_LINE.match(line)).split())
+            names = [line.split("(")[0].split()[-1] for line in lines if _SIGNATURE_LINE.match(line)]
+            if prose:
+                summary = re.split(r'(?<=[.!?])\s', prose, maxsplit=1)[0]
+            elif names:
+                summary = "Defines " + ", ".join(names[:5]) + ("." if len(names) <= 5 else ", ...")
+            else:
+                summary = "No description."
+            answers[header.group(1)] = summary[:200]
+        response = json.dumps(answers)
+        return response, estimate_tokens(prompt) + estimate_tokens(response)
+
+
+class LLMSummaryModel:
+    """A hosted model (e.g. gemini/gemini-2.0-flash) called through LiteLLM.
+
+    LiteLLM is installed with byllm; it is imported on first use so the
+    pipeline runs without it when summaries are off or use the local
+    model. Gemini models read GEMINI_API_KEY from the environment.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._completion = None
+
+    def complete(self, prompt: str, max_tokens: int) -> Tuple[str, int]:
+        if self._completion is None:
+            from litellm import completion
+            self._completion = completion
+        response = self._completion(
+            model=self.name,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=0
+        )
+        text = response.choices[0].message.content or ""
+        usage = getattr(response, "usage", None)
+        tokens = getattr(usage, "total_tokens", None) if usage else None
+        return text, tokens or estimate_tokens(prompt) + estimate_tokens(text)
+
+
+def resolve_summary_model(name: Optional[str] = None):
+    """Model named by the argument or CODEGENIUS_SUMMARY_MODEL; None turns summaries off"""
+    name = (name if name is not None else os.getenv("CODEGENIUS_SUMMARY_MODEL", "")).strip()
+    if not name or name.lower() in ("off", "none", "false"):
+        return None
+    if name.lower() == "local":
+        return LocalSummaryModel()
+    return LLMSummaryModel(name)
+
+
+# ============================================
+# CACHE
+# ============================================
+
+class SummaryCache:
+    """Model responses per entity, keyed by a hash of model, prompt and content"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " key TEXT PRIMARY KEY,"
+            " summary TEXT NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(model: str, entity: Dict) -> str:
+        digest = hashlib.sha256()
+        for part in (model, SUMMARY_INSTRUCTIONS, entity["kind"], entity["text"]):
+            digest.update(part.encode('utf-8'))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                found.update(self._conn.execute(
+                    "SELECT key, summary FROM summaries WHERE key IN (" + ",".join("?" * len(chunk)) + ")",
+                    chunk
+                ).fetchall())
+        return found
+
+    def put_many(self, items: Dict[str, str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO summaries (key, summary, created) VALUES (?, ?, ?)",
+                [(key, summary, time.time()) for key, summary in items.items()]
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def open_summary_cache(cache_dir: Optional[str] = None) -> SummaryCache:
+    """Open the summary cache in CODEGENIUS_CACHE_DIR"""
+    cache_dir = cache_dir or os.getenv("CODEGENIUS_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return SummaryCache(os.path.join(cache_dir, "summary_cache.sqlite"))
+
+
+# ============================================
+# SUMMARIZATION
+# ============================================
+
+def build_prompt(batch: List[Dict]) -> str:
+    """One prompt covering every entity of the batch"""
+    parts = [SUMMARY_INSTRUCTIONS, ""]
+    for entity in batch:
+        parts.append("### id: " + entity["id"] + " (" + entity["kind"] + " " + entity["name"] + ")")
+        parts.append(entity["text"])
+        parts.append("")
+    return "\n".join(parts)
+
+
+def parse_response(text: str) -> Dict[str, str]:
+    """The id -> summary object from a model response, tolerating text around it"""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return {}
+    try:
+        answers = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(answers, dict):
+        return {}
+    return {str(k): v.strip() for k, v in answers.items() if isinstance(v, str) and v.strip()}
+
+
+def summarize_entities(
+    entities: List[Dict],
+    model,
+    cache: Optional[SummaryCache] = None,
+    batch_size: int = 0,
+    concurrency: int = 0,
+    token_budget: int = 0
+) -> Dict:
+    """Summaries for entities ({id, kind, name, text, fallback}) and run statistics.
+
+    Cached entities are answered first. The rest are sent batch_size to a
+    prompt, at most concurrency requests at a time. Each batch reserves its
+    estimated prompt and output tokens when it is sent, and the reservation
+    is settled with the tokens the model reports when the answer arrives.
+    A batch waits while requests in flight hold the budget it needs; with
+    nothing in flight it is halved until it fits. Entities that not even a
+    batch of one can cover use their fallback text, as do entities a model
+    answer leaves out or a failed request. Entities are processed in
+    order, so put the important first.
+    """
+    batch_size = batch_size or env_int("CODEGENIUS_SUMMARY_BATCH") or DEFAULT_BATCH_SIZE
+    concurrency = concurrency or env_int("CODEGENIUS_SUMMARY_CONCURRENCY") or DEFAULT_CONCURRENCY
+    token_budget = token_budget or env_int("CODEGENIUS_SUMMARY_TOKEN_BUDGET") or DEFAULT_TOKEN_BUDGET
+    started = time.perf_counter()
+
+    summaries: Dict[str, str] = {}
+    keys = {entity["id"]: SummaryCache.key(model.name, entity) for entity in entities}
+    cached = cache.get_many(list(keys.values())) if cache else {}
+    pending = []
+    for entity in entities:
+        summary = cached.get(keys[entity["id"]])
+        if summary is not None:
+            summaries[entity["id"]] = summary
+        else:
+            pending.append(entity)
+    cache_hits = len(summaries)
+
+    tokens_used = 0
+    failed = 0
+    requests = 0
+    generated: Dict[str, str] = {}
+
+    def send(batch: List[Dict], prompt: str):
+        try:
+            text, tokens = model.complete(prompt, OUTPUT_TOKENS_PER_ENTITY * len(batch))
+        except Exception:
+            return None, 0
+        return parse_response(text), tokens
+
+    def next_job(size: int):
+        batch = pending[sent:sent + size]
+        prompt = build_prompt(batch)
+        return batch, prompt, estimate_tokens(prompt) + OUTPUT_TOKENS_PER_ENTITY * len(batch)
+
+    # Entities sent so far, and budget not yet used or reserved by a request in flight
+    sent = 0
+    remaining = token_budget
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        while True:
+            # Send batches in order while the budget left covers their reservation
+            while sent < len(pending) and len(in_flight) < max(1, concurrency):
+                batch, prompt, reserve = next_job(batch_size)
+                if reserve > remaining and in_flight:
+                    # Requests in flight give back what they do not use
+                    break
+                while reserve > remaining and len(batch) > 1:
+                    # Nothing left to give back: send as much of the batch as fits
+                    batch, prompt, reserve = next_job(len(batch) // 2)
+                if reserve > remaining:
+                    break
+                remaining -= reserve
+                in_flight[pool.submit(send, batch, prompt)] = (batch, reserve)
+                sent += len(batch)
+                requests += 1
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch, reserve = in_flight.pop(future)
+                answers, tokens = future.result()
+                # Settle the reservation with what the request actually used
+                remaining += reserve - tokens
+                tokens_used += tokens
+                if answers is None:
+                    failed += 1
+                    continue
+                for entity in batch:
+                    summary = answers.get(entity["id"])
+                    if summary:
+                        generated[entity["id"]] = summary
+    if cache and generated:
+        cache.put_many({keys[entity_id]: summary for entity_id, summary in generated.items()})
+    summaries.update(generated)
+
+    fallbacks = 0
+    for entity in entities:
+        if entity["id"] not in summaries:
+            summaries[entity["id"]] = entity["fallback"]
+            fallbacks += 1
+
+    return {
+        "summaries": summaries,
+        "stats": {
+            "model": model.name,
+            "entities": len(entities),
+            "cache_hits": cache_hits,
+            "generated": len(generated),
+            "fallbacks": fallbacks,
+            "requests": requests,
+            "failed_requests": failed,
+            "entities_over_budget": len(pending) - sent,
+            "tokens_used": tokens_used,
+            "token_budget": token_budget,
+            "time": round(time.perf_counter() - started, 4)
+        }
+    }
+
+
+def summary_entities(readme_content: str, parsed_files: List[Dict], repo_root: str) -> List[Dict]:
+    """The README, then every module, then every class, as summary entities.
+
+    Entities are {id, kind, name, text, fallback}; classes also carry
+    key, their parsed file path and name.
+    """
+    entities = []
+    if readme_content:
+        entities.append({
+            "id": "readme",
+            "kind": "readme",
+            "name": "README",
+            "text": readme_content[:MAX_README_CHARS],
+            "fallback": summarize_text(readme_content, README_FALLBACK_LENGTH)
+        })
+
+    classes = []
+    for parsed in parsed_files:
+        if parsed.get("error"):
+            continue
+        path = os.path.relpath(parsed["file"], repo_root).replace(os.sep, '/')
+        lines = []
+        docstring = parsed.get("docstring") or ""
+        if docstring:
+            lines.append(docstring)
+        for cls in parsed.get("classes", []):
+            lines.append("class " + cls["name"] + "(" + ", ".join(cls.get("bases", [])) + ")")
+            classes.append((parsed["file"], path, cls))
+        for func in parsed.get("functions", []):
+            lines.append("def " + func["name"] + "(" + ", ".join(func.get("args", [])) + ")")
+        for name in parsed.get("nodes", []):
+            lines.append("node " + name)
+        for name in parsed.get("walkers", []):
+            lines.append("walker " + name)
+        for name in parsed.get("abilities", []):
+            lines.append("can " + name)
+        if not lines:
+            continue
+        text = "\n".join(lines)[:MAX_ENTITY_CHARS]
+        entities.append({
+            "id": "m" + str(len(entities)),
+            "kind": "module",
+            "name": path,
+            "text": text,
+            "fallback": summarize_text(docstring or text, FALLBACK_LENGTH)
+        })
+
+    for file_path, path, cls in classes:
+        lines = ["class " + cls["name"] + "(" + ", ".join(cls.get("bases", [])) + ")"]
+        if cls.get("docstring"):
+            lines.append(cls["docstring"])
+        lines.extend("def " + method for method in cls.get("methods", []))
+        text = "\n".join(lines)[:MAX_ENTITY_CHARS]
+        entities.append({
+            "id": "c" + str(len(entities)),
+            "kind": "class",
+            "name": path + ":" + cls["name"],
+            "key": file_path + ":" + cls["name"],
+            "text": text,
+            # The docs already show a class's docstring, so it has no fallback summary
+            "fallback": ""
+        })
+    return entities
+
+
+def summarize_repository(
+    readme_content: str,
+    parsed_files: List[Dict],
+    repo_root: str,
+    model,
+    use_cache: bool = True
+) -> Dict:
+    """README, module and class summaries of one repository, plus statistics"""
+    entities = summary_entities(readme_content, parsed_files, repo_root)
+    cache = open_summary_cache() if use_cache else None
+    try:
+        result = summarize_entities(entities, model, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    summaries = result["summaries"]
+    return {
+        "readme": summaries.get("readme", ""),
+        "modules": {e["name"]: summaries[e["id"]] for e in entities if e["kind"] == "module"},
+        # Keyed by the parsed file path and class name, as in the EntityStore
+        "classes": {e["key"]: summaries[e["id"]] for e in entities if e["kind"] == "class"},
+        "stats": result["stats"]
+    }
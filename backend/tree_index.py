@@ -0,0 +1,243 @@
+"""
+File tree index for Codebase Genius
+Flat index of every path in a documented repository, sorted by parent
+directory, with child counts and aggregated sizes computed once, so the
+tree can be browsed one directory level at a time
+"""
+
+import os
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from utils import is_ignored_tree_name, env_flag
+from artifact_store import stored_path, open_stored, write_stored
+
+
+TREE_INDEX_FILENAME = "tree_index.json"
+TREE_INDEX_VERSION = 1
+DEFAULT_TREE_PAGE = 200
+MAX_TREE_PAGE = 1000
+MAX_TREE_DEPTH = 5
+# Loaded indexes kept in memory, keyed by file path and modification time
+_LOADED_MAX = 8
+
+_loaded: "OrderedDict[str, tuple]" = OrderedDict()
+_loaded_lock = threading.Lock()
+
+
+def eager_tree_enabled() -> bool:
+    """Also put the fully nested file tree in the report (CODEGENIUS_EAGER_TREE=1)"""
+    return env_flag("CODEGENIUS_EAGER_TREE")
+
+
+def build_tree_index(manifest: Dict) -> Dict:
+    """Build the columnar tree index from a scan_repository manifest.
+
+    Rows are sorted by (parent, name), so the children of any directory
+    are one contiguous run found by binary search. Directory rows carry the
+    number of direct children and the total size and file count of the
+    files below them.
+    """
+    # Directory path -> [size, files, children]; "" is the repository root
+    totals: Dict[str, List[int]] = {"": [0, 0, 0]}
+    # Parent path -> its child rows; the manifest lists siblings by name,
+    # so each list only needs reversing and only the parents need sorting
+    levels: Dict[str, List[tuple]] = {}
+
+    # Reverse depth-first order visits every directory after its contents
+    for entry in reversed(manifest["entries"]):
+        parent, _, name = entry.path.rpartition('/')
+        if is_ignored_tree_name(name):
+            continue
+        parent_totals = totals.setdefault(parent, [0, 0, 0])
+        level = levels.get(parent)
+        if level is None:
+            level = levels[parent] = []
+        if entry.kind == 'directory':
+            size, files, children = totals.setdefault(entry.path, [0, 0, 0])
+            level.append((name, 'd', size, children, files))
+        else:
+            size, files = entry.size, 1
+            level.append((name, 'f', size, 0, 0))
+        parent_totals[0] += size
+        parent_totals[1] += files
+        parent_totals[2] += 1
+
+    parents, names, types, sizes, children, files = [], [], [], [], [], []
+    for parent in sorted(levels):
+        rows = levels[parent]
+        rows.reverse()
+        parents.extend([parent] * len(rows))
+        for name, kind, size, child_count, file_count in rows:
+            names.append(name)
+            types.append(kind)
+            sizes.append(size)
+            children.append(child_count)
+            files.append(file_count)
+
+    root_size, root_files, root_children = totals[""]
+    return {
+        "version": TREE_INDEX_VERSION,
+        "parents": parents,
+        "names": names,
+        "types": "".join(types),
+        "sizes": sizes,
+        "children": children,
+        "files": files,
+        "total_size": root_size,
+        "file_count": root_files,
+        "child_count": root_children
+    }
+
+
+def save_tree_index(output_dir: str, index: Dict) -> str:
+    """Write the tree index next to the documentation (compressed if configured)"""
+    data = json.dumps(index, separators=(',', ':')).encode('utf-8')
+    return write_stored(os.path.join(output_dir, TREE_INDEX_FILENAME), data)
+
+
+def load_tree_index(output_dir: str) -> Optional[Dict]:
+    """Load a saved tree index, reusing the parsed copy while the file is unchanged"""
+    found = stored_path(os.path.join(output_dir, TREE_INDEX_FILENAME))
+    if found is None:
+        return None
+    path = found[0]
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    with _loaded_lock:
+        cached = _loaded.get(path)
+        if cached is not None and cached[0] == mtime:
+            _loaded.move_to_end(path)
+            return cached[1]
+
+    try:
+        with open_stored(os.path.join(output_dir, TREE_INDEX_FILENAME)) as f:
+            index = json.load(f)
+    except (OSError, EOFError, ValueError):
+        return None
+    if index.get("version") != TREE_INDEX_VERSION:
+        return None
+
+    with _loaded_lock:
+        _loaded[path] = (mtime, index)
+        _loaded.move_to_end(path)
+        while len(_loaded) > _LOADED_MAX:
+            _loaded.popitem(last=False)
+    return index
+
+
+def _children_range(index: Dict, path: str) -> tuple:
+    parents = index["parents"]
+    return bisect_left(parents, path), bisect_right(parents, path)
+
+
+def _find(index: Dict, path: str) -> Optional[int]:
+    """Row of path, or None if the index has no such entry"""
+    parent, _, name = path.rpartition('/')
+    start, end = _children_range(index, parent)
+    row = bisect_left(index["names"], name, start, end)
+    if row < end and index["names"][row] == name:
+        return row
+    return None
+
+
+def _row(index: Dict, row: int, depth: int, budget: List[int]) -> Dict:
+    parent = index["parents"][row]
+    name = index["names"][row]
+    path = parent + "/" + name if parent else name
+    if index["types"][row] == 'f':
+        return {
+            "name": name,
+            "path": path,
+            "type": "file",
+            "size": index["sizes"][row],
+            "extension": os.path.splitext(name)[1]
+        }
+
+    item = {
+        "name": name,
+        "path": path,
+        "type": "directory",
+        "size": index["sizes"][row],
+        "child_count": index["children"][row],
+        "file_count": index["files"][row]
+    }
+    if depth > 1:
+        start, end = _children_range(index, path)
+        stop = min(end, start + max(0, budget[0]))
+        budget[0] -= stop - start
+        item["children"] = [_row(index, child, depth - 1, budget) for child in range(start, stop)]
+        item["has_more"] = stop < end
+    return item
+
+
+def list_tree_level(index: Dict, path: str = "", depth: int = 1, offset: int = 0,
+                    limit: int = DEFAULT_TREE_PAGE) -> Dict:
+    """One page of at most limit entries directly under path.
+
+    With depth > 1, directories in the page also list their own entries,
+    down to depth levels and at most limit nested entries in total; a
+    directory cut short has has_more set and can be listed on its own.
+    Pass next_offset back to get the next page.
+    """
+    start, end = _children_range(index, path)
+    total = end - start
+    offset = max(0, min(offset, total))
+    stop = min(total, offset + limit)
+    budget = [limit]
+    return {
+        "entries": [_row(index, start + i, depth, budget) for i in range(offset, stop)],
+        "offset": offset,
+        "next_offset": stop,
+        "total": total,
+        "has_more": stop < total
+    }
+
+
+def read_tree(repo_name: str, path: str = "", depth: int = 1, offset: int = 0,
+              limit: int = DEFAULT_TREE_PAGE) -> Dict:
+    """Browse the stored tree of a documented repository one level at a time"""
+    index = load_tree_index(os.path.join("outputs", repo_name))
+    if index is None:
+        return {
+            "status": "error",
+            "message": "File tree not found"
+        }
+
+    path = path.strip().strip('/')
+    if path == ".":
+        path = ""
+    if path:
+        row = _find(index, path)
+        if row is None or index["types"][row] != 'd':
+            return {
+                "status": "error",
+                "message": "Directory not found: " + path
+            }
+        directory = {
+            "size": index["sizes"][row],
+            "child_count": index["children"][row],
+            "file_count": index["files"][row]
+        }
+    else:
+        directory = {
+            "size": index["total_size"],
+            "child_count": index["child_count"],
+            "file_count": index["file_count"]
+        }
+
+    depth = max(1, min(depth or 1, MAX_TREE_DEPTH))
+    limit = max(1, min(limit or DEFAULT_TREE_PAGE, MAX_TREE_PAGE))
+    level = list_tree_level(index, path, depth, offset, limit)
+    return {
+        "status": "success",
+        "path": path,
+        **directory,
+        **level
+    }
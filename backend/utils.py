@@ -4,13 +4,41 @@ Handles git operations, file parsing, and code analysis
 """
 
 import os
+import sys
 import ast
 import re
+import json
+import mmap
+import codecs
+import time
+import shutil
+import hashlib
 import subprocess
-from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Tuple, Optional, NamedTuple
 from datetime import datetime
 
+from artifact_store import stored_path, open_stored, read_stored, write_stored
+
+
+# ============================================
+# ENVIRONMENT SETTINGS
+# ============================================
+
+def env_flag(name: str) -> bool:
+    """True when the environment variable is set to 1, true or yes"""
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes")
+
+
+def env_int(name: str, default: int = 0) -> int:
+    """Integer environment variable, or default when it is unset or malformed"""
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
 
 # ============================================
 # GIT OPERATIONS
@@ -22,50 +50,250 @@ def validate_github_url(url: str) -> bool:
     return bool(re.match(pattern, url.rstrip('.git')))
 
 
-def clone_repository(url: str, target_dir: str) -> Dict[str, any]:
+def validate_repository_url(url: str) -> bool:
+    """Validate a repository URL: GitHub, or file:// when local repos are allowed"""
+    if validate_github_url(url):
+        return True
+    allow_local = env_flag("CODEGENIUS_ALLOW_LOCAL_REPOS")
+    return allow_local and url.startswith("file://") and len(url) > len("file://")
+
+
+# Extra `git clone` arguments per clone strategy
+CLONE_STRATEGIES = {
+    "full": [],
+    "shallow": ['--depth', '1'],
+    "blobless": ['--filter=blob:none'],
+    "sparse": ['--filter=blob:none', '--sparse'],
+}
+
+# Paths checked out by the sparse strategy: only what the analyzers read
+SPARSE_PATTERNS = ['*.py', '*.jac', 'README*', 'readme*']
+
+
+def resolve_clone_strategy(strategy: Optional[str] = None) -> Optional[str]:
+    """Resolve the clone strategy (argument, then CODEGENIUS_CLONE_STRATEGY, then full).
+
+    Returns None for a name that is not in CLONE_STRATEGIES.
+    """
+    strategy = (strategy or os.getenv("CODEGENIUS_CLONE_STRATEGY", "") or "full").strip().lower()
+    return strategy if strategy in CLONE_STRATEGIES else None
+
+
+def clone_strategy_error(strategy: Optional[str] = None) -> Optional[str]:
+    """Error message naming the valid strategies, or None if strategy resolves"""
+    if resolve_clone_strategy(strategy) is not None:
+        return None
+    name = strategy or os.getenv("CODEGENIUS_CLONE_STRATEGY", "")
+    return f"Unknown clone strategy '{name}'; use one of: {', '.join(CLONE_STRATEGIES)}"
+
+
+def clone_repository(url: str, target_dir: str, strategy: Optional[str] = None) -> Dict[str, any]:
     """Clone a GitHub repository to target directory"""
+    error = clone_strategy_error(strategy)
+    if error:
+        return {
+            "success": False,
+            "path": None,
+            "message": error
+        }
+    strategy = resolve_clone_strategy(strategy)
+    started = time.perf_counter()
     try:
+        # A leftover clone would make git refuse to clone into the directory
+        if os.path.isdir(target_dir) and os.listdir(target_dir):
+            shutil.rmtree(target_dir)
+        
         # Create target directory if it doesn't exist
         os.makedirs(target_dir, exist_ok=True)
         
         # Clone the repository
         result = subprocess.run(
-            ['git', 'clone', url, target_dir],
+            ['git', 'clone', *CLONE_STRATEGIES[strategy], url, target_dir],
             capture_output=True,
             text=True,
             timeout=300
         )
         
+        if result.returncode == 0 and strategy == "sparse":
+            # Narrow the checkout to the file types the analyzers use
+            result = _run_git(target_dir, 'sparse-checkout', 'set', '--no-cone', *SPARSE_PATTERNS)
+        
         if result.returncode == 0:
             return {
                 "success": True,
                 "path": target_dir,
+                "strategy": strategy,
+                "bytes": directory_size(target_dir),
+                "time": round(time.perf_counter() - started, 4),
                 "message": "Repository cloned successfully"
             }
         else:
             return {
                 "success": False,
                 "path": None,
+                "strategy": strategy,
                 "message": f"Clone failed: {result.stderr}"
             }
     except subprocess.TimeoutExpired:
         return {
             "success": False,
             "path": None,
+            "strategy": strategy,
             "message": "Clone operation timed out"
         }
     except Exception as e:
         return {
             "success": False,
             "path": None,
+            "strategy": strategy,
             "message": f"Error: {str(e)}"
         }
 
 
 def extract_repo_name(url: str) -> str:
     """Extract repository name from GitHub URL"""
-    parts = url.rstrip('/').rstrip('.git').split('/')
-    return parts[-1]
+    url = url.rstrip('/')
+    # Only a literal ".git" suffix; rstrip('.git') would also eat "big" -> "b"
+    if url.endswith('.git'):
+        url = url[:-len('.git')]
+    return url.split('/')[-1]
+
+
+def normalize_repository_url(url: str) -> str:
+    """Canonical form of a repository URL: no trailing slash or .git suffix,
+    lowercase owner and name for GitHub (which treats them case-insensitively)"""
+    url = url.strip().rstrip('/')
+    if url.endswith('.git'):
+        url = url[:-len('.git')]
+    match = re.match(r'^https?://(?:www\.)?github\.com/([\w-]+)/([\w.-]+)$', url, re.IGNORECASE)
+    if match:
+        return f"https://github.com/{match.group(1).lower()}/{match.group(2).lower()}"
+    return url
+
+
+def resolve_remote_head(url: str) -> Optional[str]:
+    """Commit SHA of the remote's HEAD via `git ls-remote` (no clone needed)"""
+    try:
+        result = subprocess.run(
+            ['git', 'ls-remote', url, 'HEAD'],
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0 or not result.stdout.strip():
+        return None
+    return result.stdout.split()[0]
+
+
+def git_blob_shas(repo_path: str) -> Dict[str, str]:
+    """Map each tracked file's absolute path to its git blob SHA (one git call)"""
+    try:
+        result = subprocess.run(
+            ['git', '-C', repo_path, 'ls-files', '-s', '-z'],
+            capture_output=True,
+            timeout=60
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return {}
+    if result.returncode != 0:
+        return {}
+
+    shas = {}
+    for record in result.stdout.decode('utf-8', 'surrogateescape').split('\0'):
+        if not record:
+            continue
+        # "<mode> <sha> <stage>\t<path>"
+        meta, _, rel_path = record.partition('\t')
+        shas[os.path.join(repo_path, rel_path)] = meta.split(' ')[1]
+    return shas
+
+
+def _run_git(repo_path: str, *args: str, timeout: int = 300) -> subprocess.CompletedProcess:
+    """Run a git command inside repo_path"""
+    return subprocess.run(
+        ['git', '-C', repo_path, *args],
+        capture_output=True,
+        text=True,
+        timeout=timeout
+    )
+
+
+def get_head_commit(repo_path: str) -> Optional[str]:
+    """Return the commit SHA checked out in repo_path"""
+    try:
+        result = _run_git(repo_path, 'rev-parse', 'HEAD', timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def update_repository(url: str, repo_path: str) -> Dict[str, any]:
+    """Fetch the remote's default branch into an existing clone and check it out"""
+    if not os.path.isdir(os.path.join(repo_path, '.git')):
+        return {"success": False, "commit": None, "message": "No existing clone"}
+
+    try:
+        fetch = _run_git(repo_path, 'fetch', '--quiet', url, 'HEAD')
+        if fetch.returncode != 0:
+            return {"success": False, "commit": None, "message": f"Fetch failed: {fetch.stderr}"}
+
+        reset = _run_git(repo_path, 'reset', '--quiet', '--hard', 'FETCH_HEAD', timeout=60)
+        if reset.returncode != 0:
+            return {"success": False, "commit": None, "message": f"Checkout failed: {reset.stderr}"}
+    except subprocess.TimeoutExpired:
+        return {"success": False, "commit": None, "message": "Fetch operation timed out"}
+    except Exception as e:
+        return {"success": False, "commit": None, "message": f"Error: {str(e)}"}
+
+    return {
+        "success": True,
+        "commit": get_head_commit(repo_path),
+        "message": "Repository updated successfully"
+    }
+
+
+def diff_changed_files(repo_path: str, old_commit: str, new_commit: str) -> Optional[Dict[str, List[str]]]:
+    """List files changed between two commits using git diff --name-status.
+
+    Returns absolute paths grouped into "changed" (added, modified, or the
+    new side of a rename/copy) and "deleted", or None when the diff cannot
+    be computed (e.g. old_commit is not in the clone).
+    """
+    try:
+        result = _run_git(repo_path, 'diff', '--name-status', '-z', '-M', old_commit, new_commit, timeout=120)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+
+    changes = {"changed": [], "deleted": []}
+    fields = result.stdout.split('\0')
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i][0]
+        if status in ('R', 'C'):
+            old_path, new_path = fields[i + 1], fields[i + 2]
+            if status == 'R':
+                changes["deleted"].append(os.path.join(repo_path, old_path))
+            changes["changed"].append(os.path.join(repo_path, new_path))
+            i += 3
+        else:
+            target = "deleted" if status == 'D' else "changed"
+            changes[target].append(os.path.join(repo_path, fields[i + 1]))
+            i += 2
+    return changes
+
+
+def git_blob_sha(file_path: str) -> Optional[str]:
+    """Compute the git blob SHA of a file that git does not track"""
+    try:
+        with open(file_path, 'rb') as f:
+            content = f.read()
+    except OSError:
+        return None
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
 
 
 # ============================================
@@ -84,41 +312,133 @@ IGNORED_FILES = {
 }
 
 
-def build_file_tree(root_path: str, max_depth: int = 5) -> Dict:
-    """Build a structured file tree representation"""
-    def should_ignore(name: str) -> bool:
-        return name in IGNORED_DIRS or any(name.endswith(ext) for ext in ['.pyc', '.pyo', '.pyd'])
-    
-    def traverse(path: str, depth: int = 0) -> Dict:
-        if depth > max_depth:
-            return {}
-        
-        tree = {"type": "directory", "children": {}}
-        
+ENTRY_POINT_NAMES = {'main.py', 'app.py', '__main__.py', 'run.py', 'server.py', 'main.jac'}
+
+
+class ManifestEntry(NamedTuple):
+    """A single file or directory found by scan_repository"""
+    path: str       # path relative to the repository root, '/'-separated
+    size: int       # size in bytes (0 for directories)
+    extension: str  # file extension including the dot, '' for directories
+    kind: str       # 'file' or 'directory'
+    depth: int      # 0 for top-level entries
+
+
+def scan_repository(root_path: str) -> Dict:
+    """Walk the repository once and return a manifest of every entry.
+
+    The walk uses os.scandir so the file type (and, where the platform
+    provides it, the stat data) cached on each DirEntry is reused instead
+    of issuing separate isdir/getsize calls. Entries are listed in sorted
+    depth-first order, so every consumer sees the same deterministic view.
+    """
+    started = time.perf_counter()
+    entries: List[ManifestEntry] = []
+
+    def walk(path: str, prefix: str, depth: int) -> None:
         try:
-            for item in sorted(os.listdir(path)):
-                if should_ignore(item):
-                    continue
-                
-                item_path = os.path.join(path, item)
-                
-                if os.path.isdir(item_path):
-                    tree["children"][item] = traverse(item_path, depth + 1)
+            with os.scandir(path) as it:
+                items = sorted(it, key=lambda e: e.name)
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            return
+
+        for item in items:
+            rel_path = prefix + item.name
+            try:
+                if item.is_dir(follow_symlinks=False):
+                    if item.name in IGNORED_DIRS:
+                        continue
+                    entries.append(ManifestEntry(rel_path, 0, '', 'directory', depth))
+                    walk(item.path, rel_path + '/', depth + 1)
                 else:
-                    # Get file info
-                    size = os.path.getsize(item_path)
-                    ext = os.path.splitext(item)[1]
-                    tree["children"][item] = {
-                        "type": "file",
-                        "size": size,
-                        "extension": ext
-                    }
-        except PermissionError:
-            pass
-        
-        return tree
-    
-    return traverse(root_path)
+                    size = item.stat(follow_symlinks=False).st_size
+                    ext = os.path.splitext(item.name)[1]
+                    entries.append(ManifestEntry(rel_path, size, ext, 'file', depth))
+            except OSError:
+                continue
+
+    walk(root_path, '', 0)
+
+    return {
+        "root": root_path,
+        "entries": entries,
+        "file_count": sum(1 for e in entries if e.kind == 'file'),
+        "directory_count": sum(1 for e in entries if e.kind == 'directory'),
+        "scan_time": round(time.perf_counter() - started, 4)
+    }
+
+
+def manifest_files(manifest: Dict, extension: Optional[str] = None) -> List[str]:
+    """List absolute paths of manifest files, optionally filtered by extension"""
+    root = manifest["root"]
+    return [
+        os.path.join(root, e.path)
+        for e in manifest["entries"]
+        if e.kind == 'file' and (extension is None or e.extension == extension)
+    ]
+
+
+def is_ignored_tree_name(name: str) -> bool:
+    """Names left out of file trees: ignored directories and compiled Python files"""
+    return name in IGNORED_DIRS or name.endswith(('.pyc', '.pyo', '.pyd'))
+
+
+def build_file_tree(root_path: str, max_depth: int = 5, manifest: Optional[Dict] = None) -> Dict:
+    """Build a structured file tree representation.
+
+    Builds the whole nested tree at once; the pipeline only does so when
+    CODEGENIUS_EAGER_TREE is set. Browsing goes through the lazy tree index
+    (tree_index.py) instead.
+    """
+    if manifest is None:
+        manifest = scan_repository(root_path)
+
+    tree = {"type": "directory", "children": {}}
+    # Directory path -> its node in the tree; None marks a pruned subtree
+    nodes: Dict[str, Optional[Dict]] = {"": tree}
+
+    for entry in manifest["entries"]:
+        parent_path, _, name = entry.path.rpartition('/')
+        parent = nodes.get(parent_path)
+        if parent is None or is_ignored_tree_name(name):
+            if entry.kind == 'directory':
+                nodes[entry.path] = None
+            continue
+
+        if entry.kind == 'directory':
+            if entry.depth + 1 > max_depth:
+                parent["children"][name] = {}
+                nodes[entry.path] = None
+            else:
+                node = {"type": "directory", "children": {}}
+                parent["children"][name] = node
+                nodes[entry.path] = node
+        else:
+            parent["children"][name] = {
+                "type": "file",
+                "size": entry.size,
+                "extension": entry.extension
+            }
+
+    return tree
+
+
+def directory_size(path: str) -> int:
+    """Total size in bytes of all files below path, .git included"""
+    total = 0
+    try:
+        with os.scandir(path) as it:
+            for item in it:
+                try:
+                    if item.is_dir(follow_symlinks=False):
+                        total += directory_size(item.path)
+                    else:
+                        total += item.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return total
 
 
 def find_readme(repo_path: str) -> Optional[str]:
@@ -137,56 +457,176 @@ def find_readme(repo_path: str) -> Optional[str]:
     return None
 
 
-def find_entry_points(repo_path: str) -> List[str]:
+def find_entry_points(repo_path: str, manifest: Optional[Dict] = None) -> List[str]:
     """Find main entry point files"""
-    entry_patterns = ['main.py', 'app.py', '__main__.py', 'run.py', 'server.py', 'main.jac']
-    entry_files = []
-    
-    for root, dirs, files in os.walk(repo_path):
-        # Skip ignored directories
-        dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
-        
-        for file in files:
-            if file in entry_patterns:
-                entry_files.append(os.path.join(root, file))
-    
-    return entry_files
+    if manifest is None:
+        manifest = scan_repository(repo_path)
+
+    return [
+        os.path.join(repo_path, e.path)
+        for e in manifest["entries"]
+        if e.kind == 'file' and e.path.rpartition('/')[2] in ENTRY_POINT_NAMES
+    ]
 
 
-def get_python_files(repo_path: str) -> List[str]:
+def get_python_files(repo_path: str, manifest: Optional[Dict] = None) -> List[str]:
     """Get all Python files in repository"""
-    python_files = []
-    
-    for root, dirs, files in os.walk(repo_path):
-        # Skip ignored directories
-        dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
-        
-        for file in files:
-            if file.endswith('.py'):
-                python_files.append(os.path.join(root, file))
-    
-    return python_files
+    if manifest is None:
+        manifest = scan_repository(repo_path)
+    return manifest_files(manifest, '.py')
 
 
-def get_jac_files(repo_path: str) -> List[str]:
+def get_jac_files(repo_path: str, manifest: Optional[Dict] = None) -> List[str]:
     """Get all Jac files in repository"""
-    jac_files = []
-    
-    for root, dirs, files in os.walk(repo_path):
-        # Skip ignored directories
-        dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
-        
-        for file in files:
-            if file.endswith('.jac'):
-                jac_files.append(os.path.join(root, file))
-    
-    return jac_files
+    if manifest is None:
+        manifest = scan_repository(repo_path)
+    return manifest_files(manifest, '.jac')
+
+
+# ============================================
+# FILE TRIAGE
+# ============================================
+
+# Files larger than this are not parsed (CODEGENIUS_MAX_PARSE_KB overrides)
+DEFAULT_MAX_PARSE_KB = 1024
+# Bytes read from the start of each file to classify it
+TRIAGE_HEADER_BYTES = 4096
+GENERATED_SUFFIXES = ('_pb2.py', '_pb2_grpc.py')
+# A generated file says so in a comment on one of its first lines
+GENERATED_HEADER_LINES = 5
+# A "#" or "//" comment saying "DO NOT EDIT", "@generated" or "auto-generated
+# by": Go, protoc and gRPC plugins, Thrift ("Autogenerated by Thrift") and SWIG
+# ("automatically generated by SWIG"). Free text in docstrings never matches.
+_GENERATED_HEADER = re.compile(rb'''
+    ^[ \t]*(?:\#|//).*?
+    (?: DO[ ]NOT[ ]EDIT
+      | @generated\b
+      | (?i:auto(?:matically)?[- ]?generated[ ]by)
+    )
+''', re.VERBOSE)
+
+
+def resolve_max_parse_bytes(max_kb: Optional[int] = None) -> int:
+    """Size limit for parsing (argument, then env, then DEFAULT_MAX_PARSE_KB)"""
+    if not max_kb:
+        max_kb = env_int("CODEGENIUS_MAX_PARSE_KB")
+    return (max_kb or DEFAULT_MAX_PARSE_KB) * 1024
+
+
+def _read_header(file_path: str, size: int) -> bytes:
+    """First TRIAGE_HEADER_BYTES of a file through a read-only memory map"""
+    if size == 0:
+        return b''
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[:TRIAGE_HEADER_BYTES]
+
+
+def classify_file(file_path: str, size: int, max_bytes: int) -> Optional[str]:
+    """Why file_path should not be parsed, or None if it should.
+
+    Reasons: "oversize", "generated", "binary", "minified" and "unreadable".
+    Only the header is read, so a multi-megabyte file costs one small read.
+    """
+    if file_path.endswith(GENERATED_SUFFIXES):
+        return "generated"
+    if size > max_bytes:
+        return "oversize"
+
+    try:
+        header = _read_header(file_path, size)
+    except (OSError, ValueError):
+        return "unreadable"
+
+    if b'\0' in header:
+        return "binary"
+    try:
+        # A multi-byte character may be cut at the end of the header
+        codecs.getincrementaldecoder('utf-8')().decode(header, final=False)
+    except UnicodeDecodeError:
+        return "binary"
+
+    if any(_GENERATED_HEADER.match(line) for line in header.split(b'\n', GENERATED_HEADER_LINES)[:GENERATED_HEADER_LINES]):
+        return "generated"
+    if size > TRIAGE_HEADER_BYTES and b'\n' not in header:
+        return "minified"
+    return None
+
+
+def triage_files(
+    file_paths: List[str],
+    manifest: Optional[Dict] = None,
+    max_bytes: Optional[int] = None
+) -> Dict:
+    """Split source files into those worth parsing and those to skip.
+
+    Sizes come from the manifest when one is given. Returns {"parse": [...],
+    "skipped": [{"file", "reason", "size"}]}; parse keeps the input order.
+    """
+    if max_bytes is None:
+        max_bytes = resolve_max_parse_bytes()
+    sizes = {}
+    if manifest is not None:
+        root = manifest["root"]
+        sizes = {os.path.join(root, e.path): e.size for e in manifest["entries"] if e.kind == 'file'}
+
+    parse = []
+    skipped = []
+    for file_path in file_paths:
+        size = sizes.get(file_path)
+        if size is None:
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                size = 0
+        reason = classify_file(file_path, size, max_bytes)
+        if reason is None:
+            parse.append(file_path)
+        else:
+            skipped.append({"file": file_path, "reason": reason, "size": size})
+
+    return {"parse": parse, "skipped": skipped}
 
 
 # ============================================
 # PYTHON CODE PARSING
 # ============================================
 
+# Bump whenever parser output changes so cached results are not reused
+PARSER_VERSION = "6"
+
+_SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def _call_target(func: ast.expr) -> Optional[str]:
+    """Return the bare name a call expression refers to"""
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+
+def collect_calls(func_node: ast.AST) -> List[str]:
+    """Collect names called inside a function body.
+
+    Nested functions and classes are skipped because they are recorded as
+    entities of their own, so each AST node is visited once per file.
+    """
+    calls = {}
+    stack = list(func_node.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, _SCOPE_NODES):
+            continue
+        if isinstance(node, ast.Call):
+            name = _call_target(node.func)
+            if name:
+                calls[name] = None
+        stack.extend(ast.iter_child_nodes(node))
+    return sorted(calls)
+
+
 def parse_python_file(file_path: str) -> Dict:
     """Parse Python file and extract structure"""
     try:
@@ -211,7 +651,8 @@ def parse_python_file(file_path: str) -> Dict:
                     "line_end": node.end_lineno,
                     "args": [arg.arg for arg in node.args.args],
                     "docstring": ast.get_docstring(node),
-                    "decorators": [d.id if isinstance(d, ast.Name) else str(d) for d in node.decorator_list]
+                    "decorators": [d.id if isinstance(d, ast.Name) else str(d) for d in node.decorator_list],
+                    "calls": collect_calls(node)
                 })
             
             elif isinstance(node, ast.ClassDef):
@@ -251,44 +692,41 @@ def parse_python_file(file_path: str) -> Dict:
 
 
 def build_call_graph(parsed_files: List[Dict]) -> Dict:
-    """Build a call graph from parsed files"""
+    """Build a call graph from parsed files.
+
+    Uses the per-function call names recorded by parse_python_file and
+    resolves them against a name index of known functions and classes, so
+    no file is re-read and the cost grows with the size of the ASTs.
+    """
     call_graph = {}
     
-    # First pass: collect all functions and classes
+    # First pass: index all functions and classes by name
     all_entities = {}
     for file_data in parsed_files:
         for func in file_data.get("functions", []):
-            all_entities[func["name"]] = {
-                "type": "function",
-                "file": file_data["file"],
-                "line": func["line_start"]
-            }
+            all_entities.setdefault(func["name"], "function")
         for cls in file_data.get("classes", []):
-            all_entities[cls["name"]] = {
-                "type": "class",
-                "file": file_data["file"],
-                "line": cls["line_start"]
-            }
+            all_entities.setdefault(cls["name"], "class")
     
-    # Second pass: find relationships
+    # Second pass: resolve each function's calls against the index
+    merged = {}
     for file_data in parsed_files:
-        try:
-            with open(file_data["file"], 'r', encoding='utf-8') as f:
-                content = f.read()
+        for func in file_data.get("functions", []):
+            calls = [name for name in func.get("calls", []) if name in all_entities]
             
-            for func in file_data.get("functions", []):
-                calls = []
-                # Simple regex to find function calls
-                for entity_name in all_entities:
-                    if re.search(rf'\b{entity_name}\s*\(', content):
-                        calls.append(entity_name)
-                
+            entry = call_graph.get(func["name"])
+            if entry is None:
                 call_graph[func["name"]] = {
-                    "calls": list(set(calls)),
+                    "calls": calls,
                     "file": file_data["file"]
                 }
-        except Exception:
-            continue
+            else:
+                # Same name defined in several places (e.g. methods): merge edges,
+                # sorting once at the end rather than on every duplicate
+                merged.setdefault(func["name"], set(entry["calls"])).update(calls)
+    
+    for name, calls in merged.items():
+        call_graph[name]["calls"] = sorted(calls)
     
     return call_graph
 
@@ -337,29 +775,299 @@ def parse_jac_file(file_path: str) -> Dict:
         }
 
 
+# ============================================
+# PARALLEL ANALYSIS
+# ============================================
+
+# Below this many files the cost of starting worker processes outweighs the gain
+PARALLEL_MIN_FILES = 64
+
+
+def resolve_worker_count(workers: Optional[int] = None) -> int:
+    """Resolve the parse worker count (argument, then env, then CPU count)"""
+    if not workers:
+        workers = env_int("CODEGENIUS_PARSE_WORKERS")
+    if not workers:
+        workers = os.cpu_count() or 1
+    return max(1, workers)
+
+
+def new_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool for parsing that is safe to create from a threaded server.
+
+    Forking a process whose other threads hold locks (jac serve, background
+    jobs) can leave workers deadlocked, so on POSIX workers are forked from
+    a clean forkserver process instead of from this one.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        # Fresh workers import this module by name; under jac its directory
+        # is not necessarily on sys.path
+        module_dir = os.path.dirname(os.path.abspath(__file__))
+        if module_dir not in sys.path:
+            sys.path.append(module_dir)
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver"))
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _parse_task(task: Tuple[str, str]) -> Dict:
+    """Parse one (language, path) task; module-level so worker processes can import it"""
+    language, file_path = task
+    if language == "jac":
+        return parse_jac_file(file_path)
+    return parse_python_file(file_path)
+
+
+def analyze_files(
+    python_files: List[str],
+    jac_files: List[str],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    cache=None,
+    content_hashes: Optional[Dict[str, str]] = None,
+    on_parsed: Optional[Callable[[int], None]] = None
+) -> Dict:
+    """Parse Python and Jac files, in worker processes when it pays off.
+
+    Results are returned in input order (Python files first, then Jac files)
+    whichever mode runs, so the generated documentation is deterministic.
+    Falls back to parsing in-process when there are few files, a single
+    worker is requested, or the process pool cannot be used.
+
+    With a ParseCache, files whose content hash (from content_hashes, else
+    computed) is already cached are not parsed at all. on_parsed, if given,
+    is called with the number of files parsed so far as results come in.
+    """
+    started = time.perf_counter()
+    tasks = [("python", f) for f in python_files] + [("jac", f) for f in jac_files]
+    results: List[Optional[Dict]] = [None] * len(tasks)
+    keys: List[Optional[str]] = [None] * len(tasks)
+
+    if cache is not None:
+        content_hashes = content_hashes or {}
+        for i, (language, file_path) in enumerate(tasks):
+            digest = content_hashes.get(file_path) or git_blob_sha(file_path)
+            if digest is None:
+                continue
+            keys[i] = f"{PARSER_VERSION}:{language}:{digest}"
+            results[i] = cache.get(keys[i], file_path)
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    pending_tasks = [tasks[i] for i in pending]
+    workers = resolve_worker_count(workers)
+    parsed = None
+    mode = "serial"
+
+    def collect(results_in_order) -> List[Dict]:
+        collected = []
+        for result in results_in_order:
+            collected.append(result)
+            if on_parsed is not None:
+                on_parsed(len(collected))
+        return collected
+
+    if pending_tasks and (executor is not None or (workers > 1 and len(pending_tasks) >= PARALLEL_MIN_FILES)):
+        if not chunk_size:
+            # Several chunks per worker keeps the pool balanced when file sizes vary
+            chunk_size = max(1, min(64, len(pending_tasks) // (workers * 4)))
+        try:
+            if executor is not None:
+                parsed = collect(executor.map(_parse_task, pending_tasks, chunksize=chunk_size))
+            else:
+                with new_process_pool(workers) as pool:
+                    parsed = collect(pool.map(_parse_task, pending_tasks, chunksize=chunk_size))
+            mode = "parallel"
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            parsed = None
+
+    if parsed is None:
+        parsed = collect(_parse_task(task) for task in pending_tasks)
+        workers = 1
+
+    for i, result in zip(pending, parsed):
+        results[i] = result
+        if cache is not None and keys[i] is not None:
+            cache.put(keys[i], result)
+
+    return {
+        "parsed_files": results,
+        "mode": mode,
+        "workers": workers,
+        "files_parsed": len(pending_tasks),
+        "cache_hits": len(tasks) - len(pending_tasks) if cache is not None else 0,
+        "cache_misses": len(pending_tasks) if cache is not None else 0,
+        "parse_time": round(time.perf_counter() - started, 4)
+    }
+
+
+# ============================================
+# INCREMENTAL ANALYSIS
+# ============================================
+
+ANALYSIS_FILENAME = "analysis.json"
+
+
+def save_analysis(output_dir: str, repo_path: str, commit: Optional[str], parsed_files: List[Dict]) -> str:
+    """Persist parse results (with repo-relative paths) for later incremental runs"""
+    os.makedirs(output_dir, exist_ok=True)
+    stored = []
+    for parsed in parsed_files:
+        entry = dict(parsed)
+        entry["file"] = os.path.relpath(parsed["file"], repo_path)
+        stored.append(entry)
+
+    data = json.dumps({
+        "parser_version": PARSER_VERSION,
+        "commit": commit,
+        "parsed_files": stored
+    }, separators=(',', ':'))
+    # Compressed when CODEGENIUS_COMPRESSION is set
+    return write_stored(os.path.join(output_dir, ANALYSIS_FILENAME), data.encode('utf-8'))
+
+
+def load_analysis(output_dir: str, repo_path: str) -> Optional[Dict]:
+    """Load results saved by save_analysis, or None if missing or stale"""
+    path = os.path.join(output_dir, ANALYSIS_FILENAME)
+    try:
+        with open_stored(path) as f:
+            data = json.load(f)
+    except (OSError, EOFError, ValueError):
+        return None
+    if data.get("parser_version") != PARSER_VERSION:
+        return None
+
+    for parsed in data["parsed_files"]:
+        parsed["file"] = os.path.join(repo_path, parsed["file"])
+    return data
+
+
+def reanalyze_changed_files(
+    python_files: List[str],
+    jac_files: List[str],
+    previous_parsed: List[Dict],
+    changed_files: List[str],
+    **analyze_options
+) -> Dict:
+    """Re-parse only changed (or previously unseen) files and reuse the rest.
+
+    Deleted files drop out because they are no longer in python_files or
+    jac_files. The merged results keep analyze_files' ordering.
+    """
+    previous = {parsed["file"]: parsed for parsed in previous_parsed}
+    changed = set(changed_files)
+
+    def needs_parse(file_path: str) -> bool:
+        return file_path in changed or file_path not in previous
+
+    analysis = analyze_files(
+        [f for f in python_files if needs_parse(f)],
+        [f for f in jac_files if needs_parse(f)],
+        **analyze_options
+    )
+
+    fresh = iter(analysis["parsed_files"])
+    merged = [
+        next(fresh) if needs_parse(f) else previous[f]
+        for f in python_files + jac_files
+    ]
+
+    analysis["parsed_files"] = merged
+    analysis["files_reused"] = len(merged) - analysis["files_parsed"] - analysis["cache_hits"]
+    return analysis
+
+
+# ============================================
+# RESULT CACHE
+# ============================================
+
+RESULT_FILENAME = "result.json"
+# Bump whenever the rendered documentation or the report changes for the
+# same input, so results stored by older code are not served
+PIPELINE_VERSION = "3"
+
+
+def result_version() -> str:
+    """Version of the code behind a stored result: pipeline and parser"""
+    return PIPELINE_VERSION + "." + PARSER_VERSION
+
+
+def result_options_digest(options: Dict) -> str:
+    """Digest of the settings that shape a run's output"""
+    return hashlib.sha256(json.dumps(options, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def save_result(output_dir: str, report: Dict, options_digest: str) -> str:
+    """Store a completed pipeline report next to its docs.md, with the code
+    version and settings it was produced with"""
+    result_path = os.path.join(output_dir, RESULT_FILENAME)
+    partial_path = result_path + ".partial"
+    stored = dict(report, pipeline_version=result_version(), options_digest=options_digest)
+    with open(partial_path, 'w', encoding='utf-8') as f:
+        json.dump(stored, f)
+    os.replace(partial_path, result_path)
+    return result_path
+
+
+def load_cached_result(output_dir: str, url: str, commit: str, options_digest: str) -> Optional[Dict]:
+    """The stored report for url at commit, if it was produced by this code
+    with the same settings and its docs.md still exists"""
+    result_path = os.path.join(output_dir, RESULT_FILENAME)
+    try:
+        with open(result_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    # Another owner's repository with the same name shares the output directory
+    if normalize_repository_url(report.get("url", "")) != normalize_repository_url(url):
+        return None
+    if not commit or report.get("commit") != commit:
+        return None
+    if report.get("pipeline_version") != result_version() or report.get("options_digest") != options_digest:
+        return None
+    if stored_path(report.get("documentation_path", "")) is None:
+        return None
+    # The clone may have been evicted or deleted since the run
+    if not os.path.isdir(report.get("local_path", "")):
+        report["local_path"] = ""
+    return report
+
+
 # ============================================
 # MERMAID DIAGRAM GENERATION
 # ============================================
 
-def generate_class_diagram(parsed_files: List[Dict]) -> str:
-    """Generate Mermaid class diagram"""
+def generate_class_diagram(parsed_files: List[Dict], class_names: Optional[List[str]] = None) -> str:
+    """Generate Mermaid class diagram.
+
+    With class_names (e.g. the most central classes), draws those classes
+    in that order; otherwise the classes of the first 10 files.
+    """
     lines = ["```mermaid", "classDiagram"]
-    
-    for file_data in parsed_files[:10]:  # Limit to first 10 files
-        for cls in file_data.get("classes", []):
-            class_name = cls["name"]
-            lines.append(f"    class {class_name} {{")
-            
-            # Add methods
-            for method in cls.get("methods", [])[:5]:  # Limit methods
-                lines.append(f"        +{method}()")
-            
-            lines.append("    }")
-            
-            # Add inheritance
-            for base in cls.get("bases", []):
-                if base != "object":
-                    lines.append(f"    {base} <|-- {class_name}")
+
+    if class_names is not None:
+        by_name = {}
+        for file_data in parsed_files:
+            for cls in file_data.get("classes", []):
+                by_name.setdefault(cls["name"], cls)
+        selected = [by_name[name] for name in class_names if name in by_name]
+    else:
+        selected = [cls for file_data in parsed_files[:10] for cls in file_data.get("classes", [])]
+
+    for cls in selected:
+        class_name = cls["name"]
+        lines.append(f"    class {class_name} {{")
+        
+        # Add methods
+        for method in cls.get("methods", [])[:5]:  # Limit methods
+            lines.append(f"        +{method}()")
+        
+        lines.append("    }")
+        
+        # Add inheritance
+        for base in cls.get("bases", []):
+            if base != "object":
+                lines.append(f"    {base} <|-- {class_name}")
     
     lines.append("```")
     return "\n".join(lines)
@@ -409,6 +1117,152 @@ def summarize_text(text: str, max_length: int = 500) -> str:
     return '\n\n'.join(summary) + "..."
 
 
+def read_document_range(doc_path: str, offset: int = 0, limit: int = 256 * 1024,
+                        stop: Optional[int] = None) -> Dict:
+    """Read one page of a Markdown document without loading the whole file.
+
+    Reads at most limit bytes from offset and, where possible, ends the page
+    just before a heading outside a code fence, so each page renders as
+    self-contained Markdown. With stop, reading ends at that byte offset
+    (the end of a section). Pass next_offset back to get the following page.
+    """
+    found = stored_path(doc_path)
+    if found is None:
+        raise FileNotFoundError(doc_path)
+    # Compressed documents are decoded once and paged from memory
+    data = read_stored(doc_path) if found[1] != "none" else None
+    total_size = os.path.getsize(doc_path) if data is None else len(data)
+    stop = total_size if stop is None or stop <= 0 else min(stop, total_size)
+    offset = max(0, min(offset, stop))
+
+    if data is None:
+        with open(doc_path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read(min(limit, stop - offset))
+    else:
+        chunk = data[offset:offset + min(limit, stop - offset)]
+
+    end = len(chunk)
+    if offset + end < stop:
+        # Prefer cutting before the last heading, then after the last
+        # complete line outside a fence, then after any complete line
+        in_fence = False
+        heading_cut = line_cut = 0
+        position = 0
+        for line in chunk.splitlines(keepends=True):
+            # A bare \r ends a line too, unless it is the chunk's last byte
+            # (its \n may start the next chunk)
+            if not (line.endswith(b'\n') or (line.endswith(b'\r') and position + len(line) < len(chunk))):
+                break
+            if line.startswith(b'```'):
+                in_fence = not in_fence
+            elif line.startswith(b'#') and not in_fence and position > 0:
+                heading_cut = position
+            position += len(line)
+            if not in_fence:
+                line_cut = position
+        end = heading_cut or line_cut or position
+        if not end:
+            # A single line longer than limit: drop a trailing partial UTF-8 character
+            end = len(chunk)
+            lead = end - 1
+            while lead > 0 and chunk[lead] & 0xC0 == 0x80:
+                lead -= 1
+            width = 1 if chunk[lead] < 0x80 else 2 if chunk[lead] < 0xE0 else 3 if chunk[lead] < 0xF0 else 4
+            if end - lead < width:
+                end = lead
+
+    next_offset = offset + end
+    return {
+        "content": chunk[:end].decode('utf-8', errors='replace'),
+        "offset": offset,
+        "next_offset": next_offset,
+        "total_size": total_size,
+        "has_more": next_offset < stop
+    }
+
+
+# Document path -> (mtime_ns, size, sha256), so validators cost a stat per request
+_document_digests: Dict[str, Tuple[int, int, str]] = {}
+_DOCUMENT_DIGESTS_MAX = 256
+
+
+def document_digest(doc_path: str) -> str:
+    """SHA-256 of a document as stored, rehashed only when its size or mtime changes"""
+    found = stored_path(doc_path)
+    if found is None:
+        raise FileNotFoundError(doc_path)
+    doc_path = found[0]
+    stat = os.stat(doc_path)
+    cached = _document_digests.get(doc_path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(doc_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    if len(_document_digests) >= _DOCUMENT_DIGESTS_MAX:
+        _document_digests.clear()
+    _document_digests[doc_path] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+    return digest.hexdigest()
+
+
+# Result path -> (mtime_ns, size, [commit, documented_at])
+_stored_versions: Dict[str, Tuple[int, int, List[str]]] = {}
+
+
+def stored_version(output_dir: str) -> List[str]:
+    """Commit and documented_at of the stored report, as recorded on the Repository node"""
+    result_path = os.path.join(output_dir, RESULT_FILENAME)
+    try:
+        stat = os.stat(result_path)
+    except OSError:
+        return ["", ""]
+    cached = _stored_versions.get(result_path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    try:
+        with open(result_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return ["", ""]
+    version = [report.get("commit") or "", report.get("documented_at") or ""]
+    if len(_stored_versions) >= _DOCUMENT_DIGESTS_MAX:
+        _stored_versions.clear()
+    _stored_versions[result_path] = (stat.st_mtime_ns, stat.st_size, version)
+    return version
+
+
+def documentation_etag(output_dir: str, doc_path: str) -> str:
+    """Validator of a stored document: its hash plus the repository's recorded version.
+
+    The version is read from the stored report rather than the graph, so
+    checking it costs two stats per request while neither file changes.
+    """
+    return make_etag(document_digest(doc_path), *stored_version(output_dir))
+
+
+def make_etag(*parts) -> str:
+    """Quoted entity tag over the given version parts"""
+    digest = hashlib.sha256("\0".join(str(part) for part in parts).encode('utf-8'))
+    return '"' + digest.hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match semantics: "*" or any listed tag (weak or strong) matches"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == '*' or tag == etag:
+            return True
+    return False
+
+
 def format_file_size(size_bytes: int) -> str:
     """Format file size in human-readable format"""
     for unit in ['B', 'KB', 'MB', 'GB']:
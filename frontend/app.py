@@ -1,6 +1,10 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import time
+import gzip
+import base64
 from datetime import datetime
 
 # --- PAGE CONFIG ---
@@ -259,13 +263,220 @@ st.markdown("""
 BASE_URL = "http://localhost:8000"
 CODE_GENIUS_ENDPOINT = f"{BASE_URL}/walker/CodeGeniusSupervisor"
 GET_DOCUMENTATION_ENDPOINT = f"{BASE_URL}/walker/get_documentation"
+GET_DOC_SECTIONS_ENDPOINT = f"{BASE_URL}/walker/get_doc_sections"
 LIST_REPOSITORIES_ENDPOINT = f"{BASE_URL}/walker/list_repositories"
+SUBMIT_DOCUMENTATION_ENDPOINT = f"{BASE_URL}/walker/submit_documentation"
+JOB_RESULT_ENDPOINT = f"{BASE_URL}/walker/job_result"
+JOB_EVENTS_ENDPOINT = f"{BASE_URL}/walker/job_events"
+
+DOC_PAGE_SIZE = 256 * 1024  # bytes of documentation fetched per request
+JOB_POLL_INTERVAL = 2  # seconds between polls when streaming is unavailable
+JOB_POLL_TIMEOUT = 1800  # give up waiting on a job after this many seconds
+RESPONSE_CACHE_TTL = 60  # seconds a cached response is used before revalidating it
+RESPONSE_CACHE_MAX = 64  # cached responses kept per browser session
+
+# --- HELPERS ---
+@st.cache_resource
+def get_http_session():
+    """One pooled session for all backend calls, so connections are reused across reruns"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def response_etag(reports):
+    """The validator of a walker response: on its first report, or after a list report"""
+    for report in reports[:2]:
+        if isinstance(report, dict) and report.get("etag"):
+            return report["etag"]
+    return None
+
+
+def cached_post(endpoint, payload, max_age=RESPONSE_CACHE_TTL):
+    """POST to a walker that supports if_none_match and return (status_code, reports).
+
+    A response younger than max_age seconds is reused as is; an older one
+    is revalidated by sending its ETag, and a "not_modified" answer keeps
+    the cached reports without downloading them again.
+    """
+    cache = st.session_state.setdefault("_response_cache", {})
+    key = endpoint + json.dumps(payload, sort_keys=True)
+    entry = cache.get(key)
+    if entry and time.time() - entry["fetched_at"] < max_age:
+        return 200, entry["reports"]
+    
+    body = dict(payload)
+    if entry:
+        body["if_none_match"] = entry["etag"]
+    response = get_http_session().post(endpoint, json=body, timeout=60)
+    if response.status_code != 200:
+        return response.status_code, []
+    
+    reports = response.json().get("reports", [])
+    if entry and reports and isinstance(reports[0], dict) and reports[0].get("status") == "not_modified":
+        entry["fetched_at"] = time.time()
+        return 200, entry["reports"]
+    
+    etag = response_etag(reports)
+    if etag:
+        if len(cache) >= RESPONSE_CACHE_MAX:
+            cache.pop(min(cache, key=lambda k: cache[k]["fetched_at"]))
+        cache[key] = {"etag": etag, "reports": reports, "fetched_at": time.time()}
+    return 200, reports
+
+
+def format_size(size_bytes):
+    """Human-readable byte count"""
+    for unit in ("B", "KB", "MB"):
+        if size_bytes < 1024:
+            return f"{size_bytes:.0f} {unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.1f} GB"
+
+
+def fetch_document(repo_name, offset=0, end=0, max_pages=None):
+    """Pages of a stored document from offset up to end (0: the whole document).
+
+    Returns (pages, has_more) with None for pages when there is no
+    documentation; pages come from the response cache when still fresh.
+    """
+    pages = []
+    while max_pages is None or len(pages) < max_pages:
+        payload = {"repo_name": repo_name, "offset": offset, "limit": DOC_PAGE_SIZE}
+        if end:
+            payload["end"] = end
+        status_code, reports = cached_post(GET_DOCUMENTATION_ENDPOINT, payload)
+        if status_code != 200:
+            raise RuntimeError(f"Server error: {status_code}")
+        if not reports or reports[0].get("status") != "success":
+            return None, False
+        page = reports[0]
+        pages.append(page.get("content", ""))
+        # Servers without pagination return the whole doc at once
+        if not page.get("has_more"):
+            return pages, False
+        offset = page["next_offset"]
+    return pages, True
+
+
+def download_document(repo_name):
+    """The whole document for download; a gzip-stored doc is sent as stored and decoded here"""
+    payload = {"repo_name": repo_name, "accept_encoding": "gzip"}
+    response = get_http_session().post(GET_DOCUMENTATION_ENDPOINT, json=payload, timeout=120)
+    if response.status_code != 200:
+        raise RuntimeError(f"Server error: {response.status_code}")
+    reports = response.json().get("reports", [])
+    if not reports or reports[0].get("status") != "success":
+        return None
+    doc = reports[0]
+    if doc.get("encoding") == "gzip":
+        return gzip.decompress(base64.b64decode(doc["content_base64"])).decode("utf-8", errors="replace")
+    return doc.get("content", "")
+
+
+def render_doc_section(repo_name, entry):
+    """Render the pages of one section loaded so far, with a button for the next one"""
+    key = f"doc_pages:{repo_name}:{entry['section']}"
+    loaded = st.session_state.get(key, 1)
+    pages, has_more = fetch_document(repo_name, entry["offset"], entry["end"], loaded)
+    for content in pages or []:
+        st.markdown(content, unsafe_allow_html=True)
+    if has_more and st.button("Load more", key=key + ":more"):
+        st.session_state[key] = loaded + 1
+        st.rerun()
+
+
+def render_doc_sections(repo_name, toc):
+    """Table of contents; a section is fetched and rendered only while it is open"""
+    st.markdown("---")
+    st.caption(
+        f"{format_size(toc['total_size'])} · {toc['section_count']} headings · "
+        "open a section to load it"
+    )
+    for entry in toc["entries"]:
+        label = "\u2003" * (entry["level"] - 1) + entry["title"] + f" ({format_size(entry['size'])})"
+        if st.toggle(label, key=f"doc_open:{repo_name}:{entry['section']}"):
+            render_doc_section(repo_name, entry)
+
+
+def render_progress(events, placeholder):
+    """Show the latest state of each pipeline stage from its progress events"""
+    stages = {}
+    for event in events:
+        if event.get("stage"):
+            stages[event["stage"]] = event
+    if not stages:
+        return
+    
+    icons = {"start": "⏳", "progress": "⏳", "end": "✅", "error": "❌"}
+    lines = []
+    for stage, event in stages.items():
+        line = f"{icons.get(event['event'], '•')} **{stage}**"
+        if event.get("elapsed") is not None:
+            line += f" — {event['elapsed']:.2f}s"
+        lines.append(line)
+    
+    counters = list(stages.values())[-1].get("counters", {})
+    lines.append(
+        f"\n📄 {counters.get('files_scanned', 0)} files scanned · "
+        f"🔍 {counters.get('files_parsed', 0)} parsed · "
+        f"🧩 {counters.get('entities_found', 0)} entities"
+    )
+    placeholder.markdown("  \n".join(lines))
+
+
+def wait_for_job(job_id, status_placeholder):
+    """Follow a job's progress stream (or poll its status), then return the job_result response"""
+    events = []
+    try:
+        # Chunked NDJSON: one stage event per line, live
+        with get_http_session().post(
+            JOB_EVENTS_ENDPOINT,
+            json={"job_id": job_id, "stream": True},
+            stream=True,
+            timeout=(10, JOB_POLL_TIMEOUT)
+        ) as response:
+            if "ndjson" not in response.headers.get("content-type", ""):
+                raise ValueError("progress stream not available")
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.get("event") == "finished":
+                    break
+                events.append(event)
+                render_progress(events, status_placeholder)
+    except (ValueError, requests.exceptions.ChunkedEncodingError):
+        # Fall back to polling job_events for servers without streaming
+        deadline = time.time() + JOB_POLL_TIMEOUT
+        while time.time() < deadline:
+            response = get_http_session().post(
+                JOB_EVENTS_ENDPOINT, json={"job_id": job_id, "since": len(events)}, timeout=30
+            )
+            if response.status_code != 200:
+                return response
+            
+            reports = response.json().get("reports", [])
+            batch = reports[0] if reports else {}
+            events.extend(batch.get("events", []))
+            render_progress(events, status_placeholder)
+            if batch.get("status") not in ("queued", "running"):
+                break
+            time.sleep(JOB_POLL_INTERVAL)
+        else:
+            raise requests.exceptions.Timeout()
+    
+    return get_http_session().post(JOB_RESULT_ENDPOINT, json={"job_id": job_id}, timeout=30)
 
 # --- SESSION STATE INIT ---
 if 'generated_docs' not in st.session_state:
     st.session_state.generated_docs = []
 if 'current_repo' not in st.session_state:
     st.session_state.current_repo = None
+if 'docs_repo' not in st.session_state:
+    st.session_state.docs_repo = None
 
 # --- SIDEBAR ---
 with st.sidebar:
@@ -355,9 +566,14 @@ with tab1:
         else:
             with st.spinner("🔄 Processing repository... This may take a few minutes."):
                 try:
-                    # Call the code_genius walker
+                    # Submit a documentation job, then poll until it finishes
                     payload = {"github_url": github_url}
-                    response = requests.post(CODE_GENIUS_ENDPOINT, json=payload, timeout=600)
+                    response = get_http_session().post(SUBMIT_DOCUMENTATION_ENDPOINT, json=payload, timeout=30)
+                    
+                    if response.status_code == 200:
+                        reports = response.json().get("reports", [])
+                        if reports and reports[0].get("status") == "queued":
+                            response = wait_for_job(reports[0]["job_id"], st.empty())
                     
                     if response.status_code == 200:
                         data = response.json()
@@ -448,37 +664,47 @@ with tab2:
         view_button = st.button("👁️ View Docs")
     
     if view_button and repo_name:
-        with st.spinner("📖 Loading documentation..."):
-            try:
-                payload = {"repo_name": repo_name}
-                response = requests.post(GET_DOCUMENTATION_ENDPOINT, json=payload)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    reports = data.get("reports", [])
-                    
-                    if reports and reports[0].get("status") == "success":
-                        content = reports[0].get("content", "")
-                        
-                        st.markdown("---")
-                        st.markdown(content, unsafe_allow_html=True)
-                        
-                        # Download button
-                        st.download_button(
-                            label="⬇️ Download Documentation",
-                            data=content,
-                            file_name=f"{repo_name}_docs.md",
-                            mime="text/markdown"
-                        )
-                    else:
-                        st.warning(f"📭 No documentation found for '{repo_name}'")
-                else:
-                    st.error(f"❌ Server error: {response.status_code}")
+        st.session_state.docs_repo = repo_name
+    
+    # Kept across reruns, since opening a section reruns the script
+    docs_repo = st.session_state.docs_repo
+    if docs_repo:
+        try:
+            with st.spinner("📖 Loading documentation..."):
+                status_code, reports = cached_post(GET_DOC_SECTIONS_ENDPOINT, {"repo_name": docs_repo})
+            toc = reports[0] if status_code == 200 and reports else {}
+            
+            found = True
+            if toc.get("status") == "success" and toc.get("entries"):
+                render_doc_sections(docs_repo, toc)
+            elif status_code == 200:
+                found = False
+            else:
+                # Servers without the section index: fetch and render every page
+                with st.spinner("📖 Loading documentation..."):
+                    pages, _ = fetch_document(docs_repo)
+                found = pages is not None
+                if found:
+                    st.markdown("---")
+                    st.markdown("".join(pages), unsafe_allow_html=True)
+            
+            if not found:
+                st.warning(f"📭 No documentation found for '{docs_repo}'")
+            elif st.button("⬇️ Prepare Download"):
+                # The whole document is only fetched when it is downloaded
+                with st.spinner("Fetching the whole document..."):
+                    content = download_document(docs_repo)
+                st.download_button(
+                    label="⬇️ Download Documentation",
+                    data=content or "",
+                    file_name=f"{docs_repo}_docs.md",
+                    mime="text/markdown"
+                )
                     
-            except requests.exceptions.ConnectionError:
-                st.error("🔌 Cannot connect to the backend server. Please ensure it's running.")
-            except Exception as e:
-                st.error(f"❌ An error occurred: {str(e)}")
+        except requests.exceptions.ConnectionError:
+            st.error("🔌 Cannot connect to the backend server. Please ensure it's running.")
+        except Exception as e:
+            st.error(f"❌ An error occurred: {str(e)}")
 
 # ========================
 #   REPOSITORY HISTORY
@@ -493,12 +719,12 @@ with tab3:
     if refresh or st.session_state.get("_load_repos_once", True):
         with st.spinner("Loading repositories..."):
             try:
-                response = requests.post(LIST_REPOSITORIES_ENDPOINT)
+                # Refresh skips the TTL but still revalidates with the ETag
+                status_code, reports = cached_post(
+                    LIST_REPOSITORIES_ENDPOINT, {}, max_age=0 if refresh else RESPONSE_CACHE_TTL
+                )
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    reports = data.get("reports", [])
-                    
+                if status_code == 200:
                     if reports and isinstance(reports[0], list):
                         repos = reports[0]
                         
@@ -520,7 +746,7 @@ with tab3:
                     else:
                         st.info("📭 No repositories found.")
                 else:
-                    st.error(f"❌ Server error: {response.status_code}")
+                    st.error(f"❌ Server error: {status_code}")
                     
             except requests.exceptions.ConnectionError:
                 st.error("🔌 Cannot connect to the backend server. Please ensure it's running.")